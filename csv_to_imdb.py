@@ -9,6 +9,7 @@ Requirements:
 - A CSV file named 'movie.csv' with movie names, ratings, and IMDb IDs
 - Firefox browser installed
 - Selenium WebDriver for Firefox
+- requests (ratings are submitted through IMDb's GraphQL API when possible)
 
 The CSV format should be:
 - Column 0: Movie name
@@ -19,21 +20,172 @@ Usage:
 - Basic: python csv_to_imdb.py
 - With rating adjustment: python csv_to_imdb.py -1 (adjust rating by -1)
 - To remove ratings: python csv_to_imdb.py unmark
+- To watch the worker browsers: python csv_to_imdb.py --visible
+- To print every movie as it is processed: python csv_to_imdb.py --verbose
+
+A machine-readable summary of each run is written to 'report.json'.
 """
 
 import os
 import sys
 import time
 import csv
+import json
+import re
+import random
+import pickle
+import sqlite3
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.firefox.options import Options
 
-def login():
+# Number of parallel IMDb sessions. Kept small so we stay below IMDb's rate limits.
+MAX_WORKERS = 3
+
+# Connections kept open per host by the shared API session. Comfortably above
+# MAX_WORKERS so concurrent workers never find the pool full and drop connections.
+HTTP_POOL_MAXSIZE = 20
+
+# IMDb's GraphQL endpoint, which powers the rating widget on title pages
+IMDB_GRAPHQL_URL = 'https://api.graphql.imdb.com/'
+
+# Cookies that carry the IMDb login; without them the API cannot be used
+IMDB_AUTH_COOKIES = ('at-main', 'ubid-main')
+
+# Title page of a movie, opened directly instead of going through the search box
+IMDB_TITLE_URL = 'https://www.imdb.com/title/{imdb_id}/'
+
+# CSS selectors of the rating widget on IMDb title pages
+RATING_BAR_CSS = 'div[data-testid="hero-rating-bar__user-rating"]'  # Present on every rateable title
+RATING_SCORE_CSS = 'div[data-testid="hero-rating-bar__user-rating__score"]'  # Only once the user has rated
+RATE_BTN_CSS = RATING_BAR_CSS + ' > button'  # Opens the rating dialog
+CONFIRM_BTN_CSS = 'div.ipc-starbar ~ button'  # First button after the stars: "Rate"
+DELETE_BTN_CSS = 'div.ipc-starbar ~ button ~ button'  # Second button after the stars: "Remove rating"
+
+# Star buttons of the rating dialog, STAR_SELECTORS[rating - 1] for ratings 1-10
+STAR_SELECTORS = [f'button[aria-label="Rate {rating}"]' for rating in range(1, 11)]
+
+# Hovers and clicks a rating star in a single WebDriver round trip. IMDb only
+# accepts the click once the star is in its hover state, hence the mouseover.
+STAR_CLICK_JS = (
+    "arguments[0].scrollIntoView({block: 'center'});"
+    "arguments[0].dispatchEvent(new MouseEvent('mouseover', {bubbles: true}));"
+    "arguments[0].click();"
+)
+
+# Redirects to the logged-in user's profile, whose URL carries the user ID
+IMDB_PROFILE_URL = 'https://www.imdb.com/profile'
+
+# CSV export of every title the user has rated, first column is the IMDb ID
+IMDB_RATINGS_EXPORT_URL = 'https://www.imdb.com/user/{uid}/ratings/export'
+
+# Looks up the logged-in user's current rating of a title
+USER_RATING_QUERY = """
+query TitleUserRating($titleId: ID!) {
+  title(id: $titleId) {
+    userRating {
+      value
+    }
+  }
+}
+"""
+
+# Rates a title on behalf of the logged-in user
+RATE_MUTATION = """
+mutation RateTitle($titleId: ID!, $rating: Int!) {
+  rateTitle(input: {titleId: $titleId, rating: $rating}) {
+    rating {
+      value
+    }
+  }
+}
+"""
+
+# Removes the logged-in user's rating of a title
+DELETE_RATING_MUTATION = """
+mutation DeleteTitleRating($titleId: ID!) {
+  deleteTitleRating(input: {titleId: $titleId}) {
+    date
+  }
+}
+"""
+
+
+class ImdbApiError(Exception):
+    """Raised when IMDb's GraphQL API rejects a request or returns errors."""
+
+
+@dataclass
+class Movie:
+    """A validated row of movie.csv that is ready to be marked on IMDb."""
+    __slots__ = ('name', 'rating', 'imdb_id')
+    
+    name: str     # Movie name/title
+    rating: int   # Douban rating (1-5)
+    imdb_id: str  # IMDb ID (starting with 'tt')
+
+
+# Checkpoint of already processed movies, so an interrupted run can resume
+PROGRESS_FILE = os.path.dirname(os.path.abspath(__file__)) + '/progress.sqlite'
+
+# Number of recorded movies between two checkpoint commits
+PROGRESS_COMMIT_EVERY = 20
+
+# Checkpoint statuses that mean a movie needs no more work, per mode (is_unmark)
+DONE_STATUSES = {
+    False: ('marked', 'already_marked'),
+    True: ('unmarked', 'never_marked'),
+}
+
+# Well-formed IMDb title IDs: 'tt' followed by 7 to 10 digits
+IMDB_ID_RE = re.compile(r'tt\d{7,10}')
+
+# Bump whenever parse_csv() validates differently or the sidecar layout
+# changes, so stale sidecar caches are ignored
+CSV_CACHE_VERSION = 4
+
+# Machine-readable results of the last run
+REPORT_FILE = os.path.dirname(os.path.abspath(__file__)) + '/report.json'
+
+# Per-movie messages of the current run as (level, imdb_id, message) tuples
+LOG = Queue()
+
+# Whether per-movie messages are also printed to the console (--verbose)
+VERBOSE = False
+
+# Per-thread storage for each worker's own WebDriver session
+_thread_local = threading.local()
+
+# How often explicit waits re-check their condition (Selenium's default is 0.5s)
+WAIT_POLL_FREQUENCY = 0.2
+
+# Text found on IMDb's captcha / rate-limit pages (matched case-insensitively)
+BLOCKED_PAGE_MARKERS = ('captcha', 'access denied', 'too many requests', 'rate limit')
+
+# Seconds to back off once IMDb starts blocking before retrying a page
+BLOCKED_BACKOFF = 60
+
+# Blocked title pages in a row after which the run is aborted
+MAX_CONSECUTIVE_BLOCKS = 3
+
+# Every worker driver ever created, so they can all be closed at the end
+_worker_drivers = []
+_worker_drivers_lock = threading.Lock()
+
+
+def login(cookies=None, headless=True):
     """
     Initializes the Firefox WebDriver, navigates to IMDb sign-in page,
     and waits for the user to manually log in.
@@ -42,6 +194,17 @@ def login():
     prompting the user to log in. It then monitors the URL to detect
     when login has completed successfully.
     
+    When an already-authenticated cookie jar is passed in, the interactive
+    step is skipped: the cookies are injected into a fresh driver instead.
+    This is how the worker threads share the single manual login. Those
+    worker drivers run headless, as nobody needs to watch them.
+    
+    Args:
+        cookies (list): Cookies from driver.get_cookies() of a logged-in session.
+                        Default is None (log in interactively).
+        headless (bool): Whether a cookie-authenticated driver runs without UI.
+                         Default is True. The interactive login is always visible.
+    
     Returns:
         WebDriver: The initialized and authenticated Firefox WebDriver session
         
@@ -51,11 +214,41 @@ def login():
     try:
         # Use Firefox instead of Chrome
         options = Options()
-        options.add_argument("--start-maximized")  # Maximize browser window for better visibility
+        if cookies is not None:
+            # Worker sessions only click the rating widget, so skip everything they never look at.
+            # The interactive signin page keeps its images in case IMDb shows a captcha.
+            options.set_preference("permissions.default.image", 2)  # Don't load images
+            options.set_preference("media.autoplay.default", 5)  # Block audio and video autoplay
+            options.set_preference("dom.webnotifications.enabled", False)  # No notification prompts
+            options.set_preference("toolkit.telemetry.enabled", False)  # No telemetry uploads
+            options.set_preference("browser.cache.disk.enable", False)  # No disk cache writes
+            options.set_preference("browser.sessionstore.resume_from_crash", False)  # No session restore
+            
+            # Return from driver.get() on DOMContentLoaded; the explicit waits cover hydration
+            options.page_load_strategy = 'eager'
+        if cookies is not None and headless:
+            # Scripted sessions don't need any rendering on screen
+            options.add_argument("-headless")
+            options.set_preference("dom.ipc.processCount", 1)  # Single content process to save memory
+        else:
+            options.add_argument("--start-maximized")  # Maximize browser window for better visibility
         
         # Create Firefox driver with the specified options
         driver = webdriver.Firefox(options=options)
         
+        if cookies is not None:
+            # Cookies can only be set for the domain currently loaded
+            driver.get('https://www.imdb.com/')
+            for cookie in cookies:
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    print(f"Error adding cookie: {e}")
+            
+            # Reload so the page picks up the authenticated session
+            driver.refresh()
+            return driver
+        
         # Navigate to IMDb login page
         driver.get('https://www.imdb.com/registration/signin')
         
@@ -99,18 +292,462 @@ def login():
         raise
 
 
-def mark(is_unmark=False, rating_ajust=-1):
+def log(level, imdb_id, message):
+    """
+    Buffers a per-movie message for the JSON report.
+    
+    Console output is slow on Windows, so messages are only printed as they
+    happen when running with --verbose.
+    
+    Args:
+        level (str): 'info', 'warning' or 'error'
+        imdb_id (str): IMDb ID the message is about, if any
+        message (str): The message itself
+    """
+    LOG.put((level, imdb_id, message))
+    if VERBOSE:
+        print(message)
+
+
+def create_api_session(cookies):
+    """
+    Builds a requests session that is authenticated with the IMDb login cookies.
+    
+    Args:
+        cookies (list): Cookies from driver.get_cookies() of a logged-in session
+        
+    Returns:
+        requests.Session or None: The authenticated session, or None if the
+                                  login cookies are missing
+    """
+    if not any(cookie['name'] in IMDB_AUTH_COOKIES for cookie in cookies):
+        print('未能获取IMDB登录cookies, 将使用浏览器打分')  # "No IMDb login cookies, falling back to the browser"
+        return None
+        
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_maxsize=HTTP_POOL_MAXSIZE))
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+    session.headers.update({
+        'x-imdb-user-language': 'en-US',
+        'content-type': 'application/json',
+    })
+    return session
+
+
+def graphql(session, query, variables):
+    """
+    Sends a single query or mutation to IMDb's GraphQL API.
+    
+    Args:
+        session (requests.Session): The authenticated session
+        query (str): The GraphQL document to execute
+        variables (dict): Variables for the document
+        
+    Returns:
+        dict: The 'data' part of the response
+        
+    Raises:
+        ImdbApiError: If the HTTP request fails or the response contains errors
+    """
+    try:
+        response = session.post(IMDB_GRAPHQL_URL, json={'query': query, 'variables': variables}, timeout=20)
+        response.raise_for_status()
+        payload = response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise ImdbApiError(str(e)) from e
+        
+    if payload.get('errors'):
+        raise ImdbApiError(payload['errors'][0].get('message', 'unknown error'))
+    return payload.get('data') or {}
+
+
+def fetch_rated_ids(session):
+    """
+    Downloads the user's ratings export once and returns the rated IMDb IDs.
+    
+    Knowing every rated title up front lets mark() skip the per-movie
+    "already rated?" check entirely.
+    
+    Args:
+        session (requests.Session): The authenticated session
+        
+    Returns:
+        set or None: IMDb IDs the user has rated, or None if the export
+                     could not be retrieved (callers then check per movie)
+    """
+    try:
+        # The profile URL redirects to /user/urXXXXXXX/
+        response = session.get(IMDB_PROFILE_URL, timeout=20)
+        match = re.search(r'/user/(ur\d+)', response.url)
+        if not match:
+            print('未能获取IMDB用户ID, 将逐部检查评分状态')  # "Could not find the IMDb user ID" message
+            return None
+            
+        response = session.get(IMDB_RATINGS_EXPORT_URL.format(uid=match.group(1)), timeout=60)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f'下载IMDB评分记录失败, 将逐部检查评分状态: {e}')  # "Failed to download ratings" message
+        return None
+        
+    # A signin page or IMDb's async export page comes back as HTML with a
+    # 200 status; an empty set from it would mark every movie as unrated
+    content_type = response.headers.get('Content-Type', '')
+    reader = csv.reader(response.text.lstrip('\ufeff').splitlines())
+    header = next(reader, None)
+    if 'csv' not in content_type.lower() or not header or header[0].strip() != 'Const':
+        print('IMDB评分记录不是CSV格式, 将逐部检查评分状态')  # "Ratings export is not a CSV" message
+        return None
+        
+    rated_ids = {row[0] for row in reader if row and row[0].startswith('tt')}
+    print(f'IMDB上已有 {len(rated_ids)} 部电影的打分')  # "X movies already rated on IMDb" message
+    return rated_ids
+
+
+def rate_via_api(session, imdb_id, movie_rate, is_unmark=False, is_rated=None):
+    """
+    Marks or unmarks a title through IMDb's GraphQL API, without a browser.
+    
+    Args:
+        session (requests.Session): The authenticated session
+        imdb_id (str): IMDb ID of the title (starting with 'tt')
+        movie_rate (int): The IMDb rating (1-10) to apply when marking
+        is_unmark (bool): If True, removes the rating instead of adding it
+        is_rated (bool): Whether the user already rated the title, if known.
+                         Default is None (look it up first).
+        
+    Returns:
+        str: One of 'marked', 'unmarked', 'already_marked' or 'never_marked'
+        
+    Raises:
+        ImdbApiError: If any API call fails
+    """
+    if is_rated is None:
+        data = graphql(session, USER_RATING_QUERY, {'titleId': imdb_id})
+        is_rated = bool((data.get('title') or {}).get('userRating'))
+    
+    if is_unmark:
+        if not is_rated:
+            return 'never_marked'
+        graphql(session, DELETE_RATING_MUTATION, {'titleId': imdb_id})
+        return 'unmarked'
+        
+    if is_rated:
+        return 'already_marked'
+    graphql(session, RATE_MUTATION, {'titleId': imdb_id, 'rating': movie_rate})
+    return 'marked'
+
+
+def get_worker_driver(cookies, headless=True):
+    """
+    Returns the WebDriver owned by the calling worker thread.
+    
+    Each worker gets its own Firefox session the first time it asks for one,
+    authenticated with the cookies harvested from the interactive login.
+    
+    Args:
+        cookies (list): Cookies from the logged-in session
+        headless (bool): Whether the worker browser runs without UI
+        
+    Returns:
+        WebDriver: The authenticated Firefox WebDriver for this thread
+    """
+    driver = getattr(_thread_local, 'driver', None)
+    if driver is None:
+        driver = login(cookies, headless)
+        _thread_local.driver = driver
+        _thread_local.waits = {}
+        with _worker_drivers_lock:
+            _worker_drivers.append(driver)
+    return driver
+
+
+def get_worker_wait(driver, timeout):
+    """
+    Returns this thread's shared WebDriverWait for the given timeout.
+    
+    Waits are created once per driver and timeout instead of once per
+    action, all polling every WAIT_POLL_FREQUENCY seconds.
+    
+    Args:
+        driver (WebDriver): The worker's WebDriver
+        timeout (int): Maximum number of seconds to wait
+        
+    Returns:
+        WebDriverWait: The cached wait object
+    """
+    waits = _thread_local.waits
+    if timeout not in waits:
+        waits[timeout] = WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL_FREQUENCY)
+    return waits[timeout]
+
+
+def is_blocked_page(driver):
+    """
+    Checks whether IMDb answered with a captcha or rate-limit page.
+    
+    Args:
+        driver (WebDriver): The worker's WebDriver
+        
+    Returns:
+        bool: True if the current page looks like a soft ban
+    """
+    try:
+        page = driver.page_source.lower()
+    except Exception:
+        return False
+    return any(marker in page for marker in BLOCKED_PAGE_MARKERS)
+
+
+def open_title_page(driver, imdb_id):
+    """
+    Opens a title page and waits for its rating bar.
+    
+    A missing rating bar is normally left to the caller's checks. If IMDb is
+    soft-banning the session instead, back off for BLOCKED_BACKOFF seconds
+    and refresh once, rather than letting every following movie run into
+    the full wait timeout.
+    
+    Args:
+        driver (WebDriver): The worker's WebDriver
+        imdb_id (str): IMDb ID of the title
+        
+    Returns:
+        bool: False if IMDb is still blocking the page after the retry
+    """
+    # Open the title page directly, the CSV already holds the IMDb ID
+    driver.get(IMDB_TITLE_URL.format(imdb_id=imdb_id))
+    
+    for attempt in range(2):
+        # Wait for the rating bar itself rather than sleeping a fixed time
+        try:
+            get_worker_wait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, RATING_BAR_CSS))
+            )
+            return True
+        except TimeoutException:
+            if not is_blocked_page(driver):
+                return True  # The caller's checks report a title without a rating bar
+            if attempt == 0:
+                print(f'IMDB暂时限制了访问, {BLOCKED_BACKOFF} 秒后重试: {imdb_id}')  # "IMDb is blocking, retrying later" message
+                time.sleep(BLOCKED_BACKOFF)
+                driver.refresh()
+    return False
+
+
+def wait_for_dialog_close(driver, button, timeout=5):
+    """
+    Waits until the rating dialog closes after its button has been clicked,
+    so the rating request isn't cut off by the next navigation.
+    
+    Args:
+        driver (WebDriver): The worker's WebDriver
+        button (WebElement): The button that was just clicked
+        timeout (int): Maximum number of seconds to wait
+    """
+    try:
+        get_worker_wait(driver, timeout).until(EC.invisibility_of_element(button))
+    except TimeoutException:
+        pass  # The click went through; the dialog just stayed open
+
+
+def quit_worker_drivers():
+    """
+    Closes every worker WebDriver session, ignoring errors on cleanup.
+    """
+    with _worker_drivers_lock:
+        for driver in _worker_drivers:
+            try:
+                driver.quit()  # quit() closes all browser windows and ends the driver session
+            except:
+                pass  # Ignore errors on cleanup
+        _worker_drivers.clear()
+
+
+def open_progress(path=PROGRESS_FILE):
+    """
+    Opens (and creates if needed) the SQLite checkpoint of processed movies.
+    
+    Args:
+        path (str): Location of the checkpoint database
+        
+    Returns:
+        sqlite3.Connection: The connection, usable from any thread given a lock
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE IF NOT EXISTS processed(imdb_id TEXT PRIMARY KEY, status TEXT)')
+    conn.commit()
+    return conn
+
+
+def load_finished_ids(conn, is_unmark=False):
+    """
+    Returns the IMDb IDs that a previous run already finished in this mode.
+    
+    Args:
+        conn (sqlite3.Connection): The checkpoint connection
+        is_unmark (bool): Which mode's finished statuses to look for
+        
+    Returns:
+        set: IMDb IDs to skip
+    """
+    statuses = DONE_STATUSES[is_unmark]
+    rows = conn.execute(
+        f'SELECT imdb_id FROM processed WHERE status IN ({",".join("?" * len(statuses))})', statuses
+    )
+    return {row[0] for row in rows}
+
+
+def parse_csv(file_name, can_not_found, error_movies, report=log):
+    """
+    Lazily reads movie.csv and yields only the rows that can be sent to IMDb.
+    
+    Validation happens here, before any network or browser work: rows without
+    a Douban rating are skipped, rows whose IMDb ID doesn't match IMDB_ID_RE
+    are reported as not found and malformed rows are reported as errors
+    right away. Repeated IMDb IDs (common after re-exports) are only yielded
+    once; the first row wins, as Douban exports list the newest rating first. The file
+    is streamed one row at a time, so its size doesn't matter.
+    
+    Args:
+        file_name (str): Path to the CSV file
+        can_not_found (Queue): Receives names of movies without valid IMDb IDs
+        error_movies (Queue): Receives descriptions of malformed rows
+        report (callable): Takes the (level, imdb_id, message) of each
+                           skipped row. Default is log().
+        
+    Yields:
+        Movie: Each valid movie, in file order
+    """
+    csv.field_size_limit(10 ** 7)
+    seen = set()
+    with open(file_name, 'r', encoding='utf-8') as file:
+        for line in csv.reader(file, lineterminator='\n'):
+            try:
+                # Skip entries that don't have ratings on Douban
+                if not line[1]:
+                    continue
+                    
+                # Extract data from the CSV line
+                movie_name = line[0]
+                rating = int(line[1])
+                imdb_id = line[2]
+            except (IndexError, ValueError) as e:
+                # Handle rows that don't follow the expected format
+                report('error', line[2] if len(line) >= 3 else None,
+                    f'处理行时出错: {line} - {str(e)}')  # "Error processing line" message
+                if len(line) >= 3 and line[0] and line[2]:
+                    error_movies.put(f'{line[0]}({line[2]}) - 处理异常')
+                continue
+                
+            # Skip movies without valid IMDb IDs (missing, bare 'tt', non-numeric...)
+            if not IMDB_ID_RE.fullmatch(imdb_id):
+                can_not_found.put(movie_name)
+                report('warning', imdb_id or None, f'无法在IMDB上找到： {movie_name}')  # "Cannot find on IMDb" message
+                continue
+                
+            # Skip duplicates of a movie that is already queued
+            if imdb_id in seen:
+                report('info', imdb_id, f'CSV中重复的电影, 已跳过：{movie_name}({imdb_id})')  # "Duplicate movie skipped" message
+                continue
+            seen.add(imdb_id)
+                
+            yield Movie(movie_name, rating, imdb_id)
+
+
+def load_movies(file_name, can_not_found, error_movies):
+    """
+    Yields the valid movies of the CSV file, using a pickle sidecar cache.
+    
+    The first run parses the CSV with parse_csv() and saves the validated
+    result next to it as '<file>.cache.pkl'. Later runs load that file in a
+    single pickle.load() for as long as it is newer than the CSV, and replay
+    the report entries of the skipped rows so report.json stays the same.
+    
+    Args:
+        file_name (str): Path to the CSV file
+        can_not_found (Queue): Receives names of movies without valid IMDb IDs
+        error_movies (Queue): Receives descriptions of malformed rows
+        
+    Yields:
+        Movie: Each valid movie, in file order
+    """
+    sidecar = file_name + '.cache.pkl'
+    
+    if os.path.exists(sidecar) and os.path.getmtime(sidecar) > os.path.getmtime(file_name):
+        try:
+            with open(sidecar, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception as e:
+            print(f'读取CSV缓存失败, 重新解析: {e}')  # "Could not read the CSV cache" message
+        else:
+            if cached.get('version') == CSV_CACHE_VERSION:
+                for entry in cached['log']:
+                    log(*entry)
+                for movie_name in cached['can_not_found']:
+                    can_not_found.put(movie_name)
+                for error in cached['error_movies']:
+                    error_movies.put(error)
+                yield from cached['movies']
+                return
+    
+    # Parse the CSV, streaming rows out while collecting them for the cache
+    movies = []
+    parsed_not_found = Queue()
+    parsed_errors = Queue()
+    parsed_log = []
+    
+    def report(level, imdb_id, message):
+        """
+        Logs a skipped row and keeps the entry for the sidecar cache.
+        """
+        parsed_log.append((level, imdb_id, message))
+        log(level, imdb_id, message)
+        
+    for movie in parse_csv(file_name, parsed_not_found, parsed_errors, report):
+        movies.append(movie)
+        yield movie
+        
+    for movie_name in parsed_not_found.queue:
+        can_not_found.put(movie_name)
+    for error in parsed_errors.queue:
+        error_movies.put(error)
+        
+    try:
+        with open(sidecar, 'wb') as f:
+            pickle.dump({
+                'version': CSV_CACHE_VERSION,
+                'movies': movies,
+                'can_not_found': list(parsed_not_found.queue),
+                'error_movies': list(parsed_errors.queue),
+                'log': parsed_log,
+            }, f, protocol=5)
+    except OSError as e:
+        print(f'保存CSV缓存失败: {e}')  # "Could not save the CSV cache" message
+
+
+def mark(is_unmark=False, rating_ajust=-1, visible=False, verbose=False):
     """
     Main function that processes the CSV file and marks/unmarks movies on IMDb.
     
     This function reads the movie.csv file, searches for each movie on IMDb using
     its IMDb ID, and then either adds a rating or removes an existing rating.
     
+    The user logs in once; the session cookies are then shared with up to
+    MAX_WORKERS worker threads so several movies are processed at the same
+    time. Ratings are submitted through IMDb's GraphQL API; a worker only
+    starts its own Firefox session for a movie the API could not handle.
+    
     Args:
         is_unmark (bool): If True, removes ratings instead of adding them.
                          Default is False (adding ratings).
         rating_ajust (int): Adjustment to apply to Douban ratings when converting to IMDb.
                            Range is -2 to +2, default is -1.
+        visible (bool): If True, worker browsers are shown instead of running headless.
+                        Default is False.
+        verbose (bool): If True, every movie's outcome is printed as it happens.
+                        Default is False (only the summary and report.json).
                            
     The function handles various edge cases and errors:
     - Movies without IMDb IDs
@@ -118,170 +755,261 @@ def mark(is_unmark=False, rating_ajust=-1):
     - Movies that don't have ratings (when unmarking)
     - Various UI interaction failures
     
-    It keeps track of successes, failures, and provides a summary at the end.
+    It keeps track of successes, failures, and provides a summary at the end,
+    which is also written to report.json.
     """
-    # Initialize the WebDriver with user authentication
-    driver = login()
+    global VERBOSE
+    VERBOSE = verbose
     
-    # Counters and lists for tracking results
-    success_marked = 0     # Successfully rated movies
-    success_unmarked = 0   # Successfully unrated movies
-    can_not_found = []     # Movies without valid IMDb IDs
-    already_marked = []    # Movies already rated on IMDb
-    never_marked = []      # Movies without ratings on IMDb
-    error_movies = []      # Movies that encountered errors during processing
+    # Log in interactively once and keep only the session cookies
+    login_driver = login()
+    cookies = login_driver.get_cookies()
+    try:
+        login_driver.quit()
+    except:
+        pass  # Ignore errors on cleanup
     
-    # Get the full path to the CSV file in the same directory as the script
-    file_name = os.path.dirname(os.path.abspath(__file__)) + '/movie.csv'
+    # One shared HTTP session (and connection pool) for all API calls
+    api_session = create_api_session(cookies)
     
-    # Open and process the CSV file
-    with open(file_name, 'r', encoding='utf-8') as file:
-        content = csv.reader(file, lineterminator='\n')
-        for line in content:
-            try:
-                # Skip entries that don't have ratings on Douban
-                if not line[1]:
-                    continue
-                    
-                # Extract data from the CSV line
-                movie_name = line[0]  # Movie name/title
-                
-                # Convert Douban rating (1-5) to IMDb rating (1-10) with adjustment
-                movie_rate = int(line[1]) * 2 + rating_ajust
-                
-                # Get the IMDb ID
-                imdb_id = line[2]
-                
-                # Skip movies without valid IMDb IDs
-                if not imdb_id or not imdb_id.startswith('tt'):
-                    can_not_found.append(movie_name)
-                    print('无法在IMDB上找到：', movie_name)  # "Cannot find on IMDb" message
-                    continue
-
-                # Wait for the search box to be available (up to 60 seconds)
-                WebDriverWait(driver, 60).until(EC.presence_of_element_located((By.ID, 'suggestion-search')))
-                
-                # Find, clear, and use the search box
-                search_bar = driver.find_element(By.ID, 'suggestion-search')
-                search_bar.clear()  # Clear any previous input
-                search_bar.send_keys(imdb_id)  # Enter the IMDb ID
-                search_bar.submit()  # Submit the search
-                
-                # Allow time for the page to load
-                time.sleep(3)
-                
+    # Everything the user has already rated, downloaded once up front
+    rated_ids = fetch_rated_ids(api_session) if api_session is not None else None
+    
+    # Resume from the checkpoint of previous runs
+    progress = open_progress()
+    progress_lock = threading.Lock()
+    finished_ids = load_finished_ids(progress, is_unmark)
+    
+    # Thread-safe counters and queues for tracking results
+    counts = Counter()        # 'success_marked' / 'success_unmarked' / 'skipped' totals
+    counts_lock = threading.Lock()
+    aborted = threading.Event()  # Set once IMDb keeps blocking the browser sessions
+    can_not_found = Queue()   # Movies without valid IMDb IDs
+    already_marked = Queue()  # Movies already rated on IMDb
+    never_marked = Queue()    # Movies without ratings on IMDb
+    error_movies = Queue()    # Movies that encountered errors during processing
+    
+    def record(status, movie_name, imdb_id, movie_rate):
+        """
+        Records the outcome of a mark/unmark attempt and prints it.
+        """
+        if status == 'never_marked':
+            # If trying to unmark but no rating exists
+            never_marked.put(f'{movie_name}({imdb_id})')
+            log('info', imdb_id, f'并没有在IMDB上打过分：{movie_name}({imdb_id})')  # "No rating on IMDb" message
+        elif status == 'already_marked':
+            # If trying to mark but already rated
+            already_marked.put(f'{movie_name}({imdb_id})')
+            log('info', imdb_id, f'已经在IMDB上打过分：{movie_name}({imdb_id})')  # "Already rated on IMDb" message
+        elif status == 'unmarked':
+            log('info', imdb_id, f'电影删除打分成功：{movie_name}({imdb_id})')  # "Successfully deleted rating" message
+            with counts_lock:
+                counts['success_unmarked'] += 1
+        elif status == 'marked':
+            log('info', imdb_id, f'电影打分成功：{movie_name}({imdb_id}) → {movie_rate}★')  # "Successfully rated" message
+            with counts_lock:
+                counts['success_marked'] += 1
+        
+        # Checkpoint the outcome, committing in batches to limit disk syncs
+        with progress_lock:
+            progress.execute('INSERT OR REPLACE INTO processed(imdb_id, status) VALUES (?, ?)', (imdb_id, status))
+            if progress.total_changes % PROGRESS_COMMIT_EVERY == 0:
+                progress.commit()
+    
+    def process_row(movie):
+        """
+        Marks or unmarks a single movie, via the API or this thread's WebDriver.
+        """
+        movie_name = movie.name
+        imdb_id = movie.imdb_id
+        
+        # Leave the rest for a later run once IMDb has soft-banned us
+        if aborted.is_set():
+            return
+            
+        # Already handled by an earlier, interrupted run
+        if imdb_id in finished_ids:
+            with counts_lock:
+                counts['skipped'] += 1
+            return
+            
+        try:
+            # Convert Douban rating (1-5) to IMDb rating (1-10) with adjustment,
+            # keeping adjusted extremes (e.g. 1★ with -2) inside IMDb's range
+            movie_rate = min(max(movie.rating * 2 + rating_ajust, 1), 10)
+            
+            # Settle the rating status from the export without touching IMDb
+            is_rated = imdb_id in rated_ids if rated_ids is not None else None
+            if is_rated is not None and is_rated != is_unmark:
+                record('already_marked' if is_rated else 'never_marked', movie_name, imdb_id, movie_rate)
+                return
+            
+            if api_session is not None:
                 try:
-                    # Check if the movie already has a rating by looking for specific elements
+                    record(rate_via_api(api_session, imdb_id, movie_rate, is_unmark, is_rated),
+                           movie_name, imdb_id, movie_rate)
+                    return
+                except ImdbApiError as e:
+                    # Fall back to the browser for this movie
+                    log('warning', imdb_id,
+                        f'IMDB接口调用失败, 改用浏览器: {movie_name}({imdb_id}) - {str(e)}')  # "API call failed, using the browser" message
+            
+            driver = get_worker_driver(cookies, headless=not visible)
+
+            if not open_title_page(driver, imdb_id):
+                error_movies.put(f'{movie_name}({imdb_id}) - 访问受限')
+                with counts_lock:
+                    counts['consecutive_blocks'] += 1
+                    blocked_too_often = counts['consecutive_blocks'] >= MAX_CONSECUTIVE_BLOCKS
+                if blocked_too_often and not aborted.is_set():
+                    aborted.set()
+                    print('IMDB持续限制访问, 停止处理剩余电影, 请稍后重新运行')  # "IMDb keeps blocking, stopping" message
+                return
+            with counts_lock:
+                counts['consecutive_blocks'] = 0
+            
+            try:
+                # Check the rating status on the page, unless the ratings
+                # export already told us
+                if is_rated is None:
+                    # Every rateable title has the rating bar, so without it
+                    # the page didn't finish loading and nothing can be decided
+                    driver.find_element(By.CSS_SELECTOR, RATING_BAR_CSS)
                     if is_unmark:
-                        # When unmarking, look for the user rating score element
-                        driver.find_element(By.XPATH, '//div[@data-testid="hero-rating-bar__user-rating__score"]')
-                    else:
-                        # When marking, look for the user rating container
-                        driver.find_element(By.XPATH, '//div[@data-testid="hero-rating-bar__user-rating"]')
-                except NoSuchElementException:
-                    # Handle cases where the movie doesn't have the expected rating status
+                        # When unmarking, look for the user rating score element;
+                        # it is filled in for the user after the page has loaded
+                        get_worker_wait(driver, 5).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, RATING_SCORE_CSS))
+                        )
+            except NoSuchElementException:
+                # Not checkpointed, so the next run tries this movie again
+                log('error', imdb_id, f'页面未加载完成: {movie_name}({imdb_id})')  # "Title page did not load" message
+                error_movies.put(f'{movie_name}({imdb_id}) - 页面未加载完成')
+            except TimeoutException:
+                # Trying to unmark, but the user has no score on this title
+                record('never_marked', movie_name, imdb_id, movie_rate)
+            else:
+                # If we reach here, we can proceed with the rating action
+                try:
+                    # Find and click the rating button
+                    get_worker_wait(driver, 10).until(
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, RATE_BTN_CSS))
+                    )
+                    driver.find_element(By.CSS_SELECTOR, RATE_BTN_CSS).click()
+
+                    # Handle the unmark (delete rating) case
                     if is_unmark:
-                        # If trying to unmark but no rating exists
-                        never_marked.append(f'{movie_name}({imdb_id})')
-                        print(f'并没有在IMDB上打过分：{movie_name}({imdb_id})')  # "No rating on IMDb" message
+                        try:
+                            # Find and click the delete button (second button after the star bar)
+                            delete_btn = get_worker_wait(driver, 5).until(
+                                EC.element_to_be_clickable((By.CSS_SELECTOR, DELETE_BTN_CSS))
+                            )
+                            delete_btn.click()
+                            wait_for_dialog_close(driver, delete_btn)
+                            record('unmarked', movie_name, imdb_id, movie_rate)
+                        except Exception as e:
+                            # Handle errors in the deletion process
+                            log('error', imdb_id,
+                                f'删除评分失败: {movie_name}({imdb_id}) - {str(e)}')  # "Failed to delete rating" message
+                            error_movies.put(f'{movie_name}({imdb_id}) - 删除失败')
                     else:
-                        # If trying to mark but already rated
-                        already_marked.append(f'{movie_name}({imdb_id})')
-                        print(f'已经在IMDB上打过分：{movie_name}({imdb_id})')  # "Already rated on IMDb" message
-                else:
-                    # If we reach here, we can proceed with the rating action
-                    try:
-                        # Find and click the rating button
-                        rate_btn_xpath = '//div[@data-testid="hero-rating-bar__user-rating"]/button'
-                        WebDriverWait(driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, rate_btn_xpath))
-                        )
-                        driver.find_element(By.XPATH, rate_btn_xpath).click()
-                        time.sleep(1)  # Brief pause for UI to update
-
-                        # Handle the unmark (delete rating) case
-                        if is_unmark:
-                            try:
-                                # Find and click the delete button (second button after the star bar)
-                                delete_btn = WebDriverWait(driver, 5).until(
-                                    EC.element_to_be_clickable((By.XPATH, "//div[@class='ipc-starbar']/following-sibling::button[2]"))
-                                )
-                                delete_btn.click()
-                                print(f'电影删除打分成功：{movie_name}({imdb_id})')  # "Successfully deleted rating" message
-                                success_unmarked += 1
-                            except Exception as e:
-                                # Handle errors in the deletion process
-                                print(f'删除评分失败: {movie_name}({imdb_id}) - {str(e)}')  # "Failed to delete rating" message
-                                error_movies.append(f'{movie_name}({imdb_id}) - 删除失败')
-                        else:
-                            # Handle the mark (add rating) case
-                            try:
-                                # Import ActionChains for complex mouse interactions
-                                from selenium.webdriver.common.action_chains import ActionChains
-                                
-                                # IMDb requires hovering over the star before clicking
-                                # Find the specific star button for our rating (1-10)
-                                star_ele_xpath = f'//button[@aria-label="Rate {movie_rate}"]'
-                                star_ele = WebDriverWait(driver, 5).until(
-                                    EC.visibility_of_element_located((By.XPATH, star_ele_xpath))
-                                )
-                                
-                                # Create and perform the hover + click action
-                                mark_action = ActionChains(driver).move_to_element(star_ele).click()
-                                mark_action.perform()
-                                time.sleep(1)  # Brief pause for UI to update
-                                
-                                # After selecting the rating, confirm it
-                                confirm_rate_ele_xpath = "//div[@class='ipc-starbar']/following-sibling::button"
-                                confirm_btn = WebDriverWait(driver, 5).until(
-                                    EC.element_to_be_clickable((By.XPATH, confirm_rate_ele_xpath))
-                                )
-                                confirm_btn.click()
-                                
-                                print(f'电影打分成功：{movie_name}({imdb_id}) → {movie_rate}★')  # "Successfully rated" message
-                                success_marked += 1
-                            except Exception as e:
-                                # Handle errors in the rating process
-                                print(f'评分失败: {movie_name}({imdb_id}) - {str(e)}')  # "Failed to rate" message
-                                error_movies.append(f'{movie_name}({imdb_id}) - 评分失败')
-                    except Exception as e:
-                        # Handle general errors in the rating interaction process
-                        print(f'处理电影时出错: {movie_name}({imdb_id}) - {str(e)}')  # "Error processing movie" message
-                        error_movies.append(f'{movie_name}({imdb_id}) - 处理错误')
-                        
-                # Pause between movies to avoid overloading the site
-                time.sleep(2)  
-            except Exception as e:
-                # Handle general errors in processing a line from the CSV
-                print(f'处理行时出错: {line} - {str(e)}')  # "Error processing line" message
-                if len(line) >= 3 and line[0] and line[2]:
-                    error_movies.append(f'{line[0]}({line[2]}) - 处理异常')
+                        # Handle the mark (add rating) case
+                        try:
+                            # IMDb requires hovering over the star before clicking
+                            # Find the specific star button for our rating (1-10)
+                            star_ele = get_worker_wait(driver, 5).until(
+                                EC.visibility_of_element_located((By.CSS_SELECTOR, STAR_SELECTORS[movie_rate - 1]))
+                            )
+                            
+                            # Hover + click the star with one script call
+                            driver.execute_script(STAR_CLICK_JS, star_ele)
+                            
+                            # After selecting the rating, confirm it once the button is clickable
+                            confirm_btn = get_worker_wait(driver, 5).until(
+                                EC.element_to_be_clickable((By.CSS_SELECTOR, CONFIRM_BTN_CSS))
+                            )
+                            confirm_btn.click()
+                            wait_for_dialog_close(driver, confirm_btn)
+                            record('marked', movie_name, imdb_id, movie_rate)
+                        except Exception as e:
+                            # Handle errors in the rating process
+                            log('error', imdb_id, f'评分失败: {movie_name}({imdb_id}) - {str(e)}')  # "Failed to rate" message
+                            error_movies.put(f'{movie_name}({imdb_id}) - 评分失败')
+                except Exception as e:
+                    # Handle general errors in the rating interaction process
+                    log('error', imdb_id,
+                        f'处理电影时出错: {movie_name}({imdb_id}) - {str(e)}')  # "Error processing movie" message
+                    error_movies.put(f'{movie_name}({imdb_id}) - 处理错误')
+                    
+            # Short random pause between movies so the browser doesn't look scripted
+            time.sleep(random.uniform(0.3, 0.8))
+        except Exception as e:
+            # Handle general errors in processing a movie
+            log('error', imdb_id, f'处理行时出错: {movie_name}({imdb_id}) - {str(e)}')  # "Error processing line" message
+            error_movies.put(f'{movie_name}({imdb_id}) - 处理异常')
+    
+    # Get the full path to the CSV file in the same directory as the script
+    file_name = os.path.dirname(os.path.abspath(__file__)) + '/movie.csv'
     
-    # Properly close the browser
+    # Spread the validated movies over the worker threads
     try:
-        driver.quit()  # quit() closes all browser windows and ends the driver session
-    except:
-        pass  # Ignore errors on cleanup
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            # Consume the iterator so every movie has finished before we continue
+            list(executor.map(process_row, load_movies(file_name, can_not_found, error_movies)))
+    finally:
+        # Properly close every worker browser
+        quit_worker_drivers()
+        
+        # Persist whatever is left of the current checkpoint batch
+        with progress_lock:
+            progress.commit()
+            progress.close()
+    
+    # Snapshot the queues for reporting
+    can_not_found = list(can_not_found.queue)
+    already_marked = list(already_marked.queue)
+    never_marked = list(never_marked.queue)
+    error_movies = list(error_movies.queue)
 
     # Print a summary of results
     print('***************************************************************************')
     
+    if counts['skipped']:
+        print(f'跳过了 {counts["skipped"]} 部之前已经处理过的电影')  # "Skipped X movies processed by an earlier run"
+        
     if is_unmark:
         # Summary for unmarking (removing ratings) operation
-        print(f'成功删除了 {success_unmarked} 部电影的打分')  # "Successfully deleted ratings for X movies"
+        print(f'成功删除了 {counts["success_unmarked"]} 部电影的打分')  # "Successfully deleted ratings for X movies"
         print(f'有 {len(can_not_found)} 部电影没能在IMDB上找到：', can_not_found)  # "X movies not found on IMDb"
         print(f'有 {len(never_marked)} 部电影并没有在IMDB上打过分：', never_marked)  # "X movies never rated on IMDb"
     else:
         # Summary for marking (adding ratings) operation
-        print(f'成功标记了 {success_marked} 部电影')  # "Successfully rated X movies"
+        print(f'成功标记了 {counts["success_marked"]} 部电影')  # "Successfully rated X movies"
         print(f'有 {len(can_not_found)} 部电影没能在IMDB上找到：', can_not_found)  # "X movies not found on IMDb"
         print(f'有 {len(already_marked)} 部电影已经在IMDB上打过分：', already_marked)  # "X movies already rated on IMDb"
     
     # Print error summary if any errors occurred
     if error_movies:
         print(f'有 {len(error_movies)} 部电影处理失败：', error_movies)  # "X movies failed processing"
+    if aborted.is_set():
+        print('由于IMDB限制访问, 部分电影未被处理, 请稍后重新运行')  # "Some movies were not processed, run again later"
         
     print('***************************************************************************')
+    
+    # Write the machine-readable report
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'success_marked': counts['success_marked'],
+            'success_unmarked': counts['success_unmarked'],
+            'skipped': counts['skipped'],
+            'can_not_found': can_not_found,
+            'already_marked': already_marked,
+            'never_marked': never_marked,
+            'errors': error_movies,
+            'aborted': aborted.is_set(),
+            'log': list(LOG.queue),
+        }, f, ensure_ascii=False, indent=2)
+    print('结果已保存至：', REPORT_FILE)  # "Results saved to" message
 
 
 # Script entry point - execution begins here when run directly
@@ -293,19 +1021,25 @@ if __name__ == '__main__':
         sys.exit()
         
     # Parse command line arguments
-    if len(sys.argv) > 1 and sys.argv[1] == 'unmark':
+    parser = argparse.ArgumentParser(description='Import Douban movie ratings from movie.csv to IMDb')
+    parser.add_argument('mode', nargs='?', help='unmark, or a rating adjustment from -2 to 2 (default: -1)')
+    parser.add_argument('--visible', '-v', action='store_true', help='Show the worker browsers instead of running headless')
+    parser.add_argument('--verbose', action='store_true', help='Print every movie as it is processed')
+    args = parser.parse_args()
+    
+    if args.mode == 'unmark':
         # If 'unmark' argument is provided, run in unmark mode
-        mark(True)
-    elif len(sys.argv) > 1:
+        mark(True, visible=args.visible, verbose=args.verbose)
+    elif args.mode is not None:
         # If a rating adjustment argument is provided
-        if sys.argv[1] not in ['-2', '-1', '0', '1', '2']:
+        if args.mode not in ['-2', '-1', '0', '1', '2']:
             # Verify the adjustment is in the valid range
             print('分数调整范围不能超过±2分(默认 -1分)，请参照：',  # "Rating adjustment must be between -2 and +2" message
                   'https://github.com/fisheepx/douban-to-imdb')
             sys.exit()
         else:
             # Run with the specified rating adjustment
-            mark(False, int(sys.argv[1]))
+            mark(False, int(args.mode), visible=args.visible, verbose=args.verbose)
     else:
         # Run with default settings (mark mode, -1 rating adjustment)
-        mark()
+        mark(visible=args.visible, verbose=args.verbose)
@@ -1,23 +1,33 @@
 import os                     # File and directory operations
 import sys                    # System-specific parameters and functions
 import csv                    # CSV file reading and writing
+import io                     # In-memory buffer for CSV rows
 import time                   # Time access and conversions
 import random                 # Generate random numbers
 import requests               # HTTP library for making requests
-import pickle                 # Python object serialization
+from requests.adapters import HTTPAdapter  # Connection pool configuration
+from urllib3.util.retry import Retry  # Transport-level retry and backoff
 import json                   # JSON encoder and decoder
-from datetime import datetime # Date and time manipulation
+import sqlite3                # Persistent IMDb ID cache
+import atexit                 # Persist caches when the interpreter exits
+import threading              # Locks shared between worker threads
+import gc                     # Periodic garbage collection on long exports
+from collections import deque # Queue of pending page downloads
+from queue import Queue, Full # Bounded hand-off between pipeline stages
+from concurrent.futures import ThreadPoolExecutor  # Concurrent page downloads
+from datetime import date, datetime  # Date and time manipulation
+from functools import lru_cache  # Memoize date parsing
 from typing import List, Dict, Optional, Union, Tuple, Any, Iterator, TypeVar  # Type hinting
-from bs4 import BeautifulSoup # HTML parsing library
+from lxml import etree        # Precompiled XPath expressions
+from lxml import html as lxml_html  # HTML parsing library
 from selenium import webdriver                     # Browser automation
 from selenium.webdriver.chrome.options import Options  # Chrome browser options
 from selenium.webdriver.chrome.service import Service  # Chrome driver service
 from selenium.webdriver.common.by import By            # Element locating strategies
-from selenium.webdriver.support.ui import WebDriverWait # Wait functionality
-from selenium.webdriver.support import expected_conditions as EC  # Wait conditions
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException  # Exception handling
 from webdriver_manager.chrome import ChromeDriverManager  # Auto-download ChromeDriver
 import argparse               # Command-line argument parsing
+import logging                # Per-movie status messages
 import re                     # Regular expression operations
 from pathlib import Path      # Object-oriented filesystem paths
 
@@ -31,19 +41,202 @@ USER_AGENTS = [
 
 # Global configuration variables
 START_DATE = '20050502'  # Default date cutoff for movie collection (YYYYMMDD format)
+_START_DT = datetime.strptime(START_DATE, '%Y%m%d')  # START_DATE parsed once, the default cutoff
 IS_OVER = False  # Flag indicating when date-based processing is complete
 MAX_RETRIES = 3  # Maximum number of retry attempts for failed requests
 RETRY_DELAY = 5  # Base delay in seconds between retry attempts (random additional delay is added)
 DRIVER: Optional[webdriver.Chrome] = None  # Global WebDriver instance for browser automation
 IS_LOGGED_IN = False  # Flag tracking login state
-COOKIE_FILE = Path(os.path.dirname(os.path.abspath(__file__))) / "douban_cookies.pkl"  # Path for storing authentication cookies
+COOKIE_FILE = Path(os.path.dirname(os.path.abspath(__file__))) / "douban_cookies.json"  # Path for storing authentication cookies
+IMDB_CACHE_FILE = Path(os.path.dirname(os.path.abspath(__file__))) / "imdb_cache.sqlite"  # Douban URL -> IMDb ID cache
+LEGACY_IMDB_CACHE_FILE = Path(os.path.dirname(os.path.abspath(__file__))) / "imdb_cache.json"  # Cache format of older versions
+IMDB_CACHE: Optional[sqlite3.Connection] = None  # Open connection to IMDB_CACHE_FILE
+IMDB_CACHE_LOCK = threading.Lock()  # Guards IMDB_CACHE across threads
+PAGE_CONCURRENCY = 4  # Number of collection pages downloaded at the same time
+IMDB_CONCURRENCY = 8  # Number of movie pages looked up for IMDb IDs at the same time
+MAX_DOUBAN_REQUESTS = 8  # Plain HTTP requests in flight to Douban at once, across both pools
+DOUBAN_SLOTS = threading.BoundedSemaphore(MAX_DOUBAN_REQUESTS)  # Enforces MAX_DOUBAN_REQUESTS
+DOUBAN_RATE = 4.0  # Sustained plain HTTP requests per second to Douban
+DOUBAN_BURST = 8  # Requests allowed back to back before DOUBAN_RATE applies
+MAX_BACKOFF = 120  # Upper bound in seconds for the pause after repeated 429 answers
+ROW_QUEUE_SIZE = 64  # Parsed movies that may wait for their IMDb lookup before parsing pauses
+GC_EVERY_PAGES = 20  # Run a full garbage collection after this many collection pages
+PAGE_LOAD_POLL = 0.2  # Seconds between document.readyState checks while a page loads
+BLOCKED_URL_PATTERNS = ["*.jpg", "*.jpeg", "*.png", "*.webp", "*.gif"]  # Never downloaded by the browser
+DRIVER_LOCK = threading.RLock()  # Serializes access to the single WebDriver across threads
+
+# Per-movie messages go through logging so they can be filtered; the
+# "Processing: ..." line per movie is only shown with --verbose
+log = logging.getLogger("douban_to_csv")
+
+# Page text Douban shows instead of the content when it wants the user to log in
+LOGIN_CHALLENGE_MARKERS = ("有异常请求从你的 IP 发出", "请 登录 使用豆瓣")
+# The same markers as Douban sends them, to check raw responses without decoding
+LOGIN_CHALLENGE_MARKERS_BYTES = tuple(marker.encode("utf-8") for marker in LOGIN_CHALLENGE_MARKERS)
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains *name*."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Page structure lookups, compiled once instead of on every page
+_ITEM_XP = etree.XPath(f"//div[{_has_class('item')}]")
+_PAGINATOR_XP = etree.XPath(f"//div[{_has_class('paginator')}]//a/text()")
+_PAGE_TITLE_XP = etree.XPath("string(//title)")
+
+# Everything get_info() reads from one movie item, in this order, with
+# the fallbacks for older page layouts next to the field they replace
+_ITEM_FIELDS = (
+    f".//li[{_has_class('title')}]//em",  # Title
+    f"(.//*[{_has_class('title')}]//a | .//a[{_has_class('title')}])[1]",  # Title, fallback
+    "(.//a/@href)[1]",  # Douban link
+    "(.//span[starts-with(@class, 'rating')]/@class)[1]",  # Rating class
+    f"(.//*[{_has_class('rate-stars')} or {_has_class('rating')}]/@class)[1]",  # Rating class, fallback
+    f".//span[{_has_class('date')}]",  # Date
+    f"(.//*[{_has_class('date')}] | .//time | .//*[{_has_class('time')}] | .//*[{_has_class('collect-date')}])[1]",  # Date, fallback
+)
+# All fields in a single evaluation, tab-separated; normalize-space() turns
+# any tab inside a field into a space, so the separator is unambiguous
+_ITEM_FIELDS_XP = etree.XPath("concat(" + ", '\t', ".join(f"normalize-space({field})" for field in _ITEM_FIELDS) + ")")
+_INFO_XP = etree.XPath("//div[@id='info']")
+_IMDB_LABEL_XP = etree.XPath(
+    f"//div[@id='info']//span[{_has_class('pl')}][contains(., 'IMDb')]/following-sibling::text()[1]"
+)
+_IMDB_HREF_XP = etree.XPath('//a[contains(@href, "imdb.com/title/tt")]/@href')
+_INFO_TEXT_XP = etree.XPath("//div[@id='info']//text()")
+
+_PARSER_LOCAL = threading.local()  # One reusable HTML parser per thread
+
+
+def parse_html(text: Union[str, bytes]) -> lxml_html.HtmlElement:
+    """
+    Parse a Douban page with this thread's shared HTML parser.
+    
+    lxml parsers are not safe to use from several threads at once, so each
+    worker thread gets its own, built on first use and reused afterwards.
+    Comments and whitespace-only text are dropped while parsing, since
+    nothing here reads them. Raw response bytes are preferred: lxml then
+    takes the encoding from the page's <meta charset> in C, instead of
+    requests guessing it in Python to build response.text.
+    
+    Args:
+        text (str or bytes): HTML of the page
+        
+    Returns:
+        lxml.html.HtmlElement: Root element of the page
+    """
+    parser = getattr(_PARSER_LOCAL, "parser", None)
+    if parser is None:
+        parser = lxml_html.HTMLParser(
+            recover=True, huge_tree=False, remove_blank_text=True, remove_comments=True
+        )
+        _PARSER_LOCAL.parser = parser
+    return lxml_html.fromstring(text, parser=parser)
+
+
+# Rating class name -> stars (1-5), e.g. "rating4-t" or "allstar40" -> 4
+_RATING_MAP = {name: i for i in range(1, 6) for name in (f'rating{i}-t', f'allstar{i * 10}')}
+_IMDB_RE = re.compile(r'tt\d+')  # IMDb title ID, e.g. "tt0111161"
+# The "IMDb: tt0111161" line of a movie page's info section, matched in the raw bytes
+_IMDB_LABEL_RE = re.compile(rb'IMDb:?\s*</span>\s*(tt\d{7,10})')
+_DATE_RE = re.compile(r'(\d{4})([-./])(\d{1,2})\2(\d{1,2})')  # yyyy-mm-dd, yyyy.mm.dd or yyyy/mm/dd
+
+# Browser-like headers sent with every plain HTTP request (the user agent is added per request)
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Pragma': 'no-cache',
+    'Cache-Control': 'no-cache',
+}
+
+# Shared HTTP session: every request to Douban reuses pooled keep-alive
+# connections instead of paying a new TCP + TLS handshake each time
+SESSION = requests.Session()
+SESSION.headers.update(DEFAULT_HEADERS)
+SESSION.trust_env = False  # Ignore proxy settings from the environment; Douban is reached directly
+# Transient failures (connection errors and 5xx answers) are retried by
+# the adapter with exponential backoff, honouring Retry-After. 429 is left
+# to DOUBAN_LIMITER, so a rate-limited request doesn't sleep and retry
+# while holding one of the DOUBAN_SLOTS
+HTTP_RETRY = Retry(
+    total=MAX_RETRIES,
+    backoff_factor=2,
+    status_forcelist=[500, 502, 503, 504],
+    respect_retry_after_header=True,
+    raise_on_status=False,  # Hand back the last response instead of raising
+)
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=HTTP_RETRY))
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=HTTP_RETRY))
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread that sends requests to one host.
+    
+    acquire() only sleeps once the burst allowance is used up, so most
+    requests go out without any delay. When the host answers 429,
+    penalize() pauses all threads, for the Retry-After time if one was
+    given and otherwise for an exponentially growing backoff. No tokens are
+    saved up during the pause, so requests resume at rate, not in a burst.
+    
+    Args:
+        rate (float): Tokens added per second
+        burst (int): Maximum number of tokens that can be saved up
+    """
+    
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0  # No request may start before this time
+        self._strikes = 0  # 429 answers since the last successful request
+        self._lock = threading.Lock()
+        
+    def acquire(self) -> None:
+        """Block until a request may be sent, then use up one token."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # No tokens accrue before _updated, which penalize() moves to
+                # the end of the pause so the bucket restarts empty
+                self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+                self._updated = max(self._updated, now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """
+        Pause all requests after the host answered 429.
+        
+        Args:
+            retry_after (float): Seconds the host asked to wait. Default is
+                                 None (back off exponentially instead).
+        """
+        with self._lock:
+            self._strikes += 1
+            if retry_after is None:
+                retry_after = min(RETRY_DELAY * 2 ** (self._strikes - 1), MAX_BACKOFF)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self._tokens = 0.0
+            self._updated = self._blocked_until
+            
+    def reset(self) -> None:
+        """Forget earlier 429 answers after a request went through."""
+        with self._lock:
+            self._strikes = 0
+
+
+DOUBAN_LIMITER = RateLimiter(DOUBAN_RATE, DOUBAN_BURST)  # Paces every plain HTTP request to Douban
 
-# At the top of the file, add these environment variables to disable proxies system-wide
-os.environ['NO_PROXY'] = '*'
-if 'HTTP_PROXY' in os.environ:
-    os.environ.pop('HTTP_PROXY')
-if 'HTTPS_PROXY' in os.environ:
-    os.environ.pop('HTTPS_PROXY')
 
 def setup_driver(headless: bool = True) -> webdriver.Chrome:
     """
@@ -103,9 +296,15 @@ def setup_driver(headless: bool = True) -> webdriver.Chrome:
             "profile.password_manager_enabled": False,  # Disable password manager
             "profile.default_content_settings.popups": 0,  # Block popups
             "profile.managed_default_content_settings.images": 2,  # Don't load images for better performance
+            "profile.managed_default_content_settings.stylesheets": 2,  # Don't load CSS, only the DOM is read
+            "profile.managed_default_content_settings.fonts": 2,  # Don't download web fonts
+            "profile.managed_default_content_settings.plugins": 2,  # Don't run plugins
         }
         chrome_options.add_experimental_option("prefs", prefs)
         
+        # Hand control back on DOMContentLoaded instead of waiting for every subresource
+        chrome_options.page_load_strategy = "eager"
+        
         # Two approaches to initializing WebDriver with different ChromeDriver sources
         try:
             # First try with explicit driver path
@@ -127,6 +326,11 @@ def setup_driver(headless: bool = True) -> webdriver.Chrome:
         # Override permissions API to prevent fingerprinting
         driver.execute_script("const originalQuery = window.navigator.permissions.query; window.navigator.permissions.query = (parameters) => { return Promise.resolve({state: 'prompt'}); };")
         
+        # Block images at the network layer; the content settings pref alone
+        # still lets some of Douban's poster and ad images through
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        
         # Set page load timeout to avoid hanging indefinitely
         driver.set_page_load_timeout(30)
         
@@ -157,6 +361,61 @@ def quit_driver() -> None:
         DRIVER = None  # Reset the global reference
 
 
+def navigate(driver: webdriver.Chrome, url: str, timeout: float = 20) -> None:
+    """
+    Load a page through the DevTools protocol.
+    
+    Page.navigate returns as soon as the navigation is committed, and the
+    document is then polled with Runtime.evaluate until its DOM is ready.
+    This is much cheaper than driver.get() followed by a WebDriverWait,
+    which blocks on every subresource and then polls for an element.
+    
+    Args:
+        driver (webdriver.Chrome): The WebDriver instance
+        url (str): The URL to load
+        timeout (float): Seconds to wait for the DOM. Default is 20.
+        
+    Raises:
+        TimeoutException: If the DOM isn't ready within the timeout
+    """
+    driver.execute_cdp_cmd("Page.navigate", {"url": url})
+    
+    deadline = time.monotonic() + timeout
+    while True:
+        state = driver.execute_cdp_cmd(
+            "Runtime.evaluate", {"expression": "document.readyState", "returnByValue": True}
+        )
+        if state.get("result", {}).get("value") in ("interactive", "complete"):
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutException(f"Timed out loading {url}")
+        time.sleep(PAGE_LOAD_POLL)
+
+
+def is_login_challenge(page_text: Union[str, bytes]) -> bool:
+    """
+    Check whether a page is Douban's login challenge instead of real content.
+    
+    Args:
+        page_text (str or bytes): HTML of the page
+        
+    Returns:
+        bool: True if the page asks the user to log in
+    """
+    markers = LOGIN_CHALLENGE_MARKERS_BYTES if isinstance(page_text, bytes) else LOGIN_CHALLENGE_MARKERS
+    return any(marker in page_text for marker in markers)
+
+
+def get_request_headers() -> Dict[str, str]:
+    """
+    Build the per-request HTTP headers, on top of SESSION's DEFAULT_HEADERS.
+    
+    Returns:
+        dict: Headers with a random user agent
+    """
+    return {'User-Agent': get_random_user_agent()}
+
+
 def get_random_user_agent() -> str:
     """
     Select a random user agent string from the predefined list.
@@ -192,7 +451,7 @@ def handle_login_challenge(driver: webdriver.Chrome, url: str) -> bool:
     
     try:
         # Check for specific text indicating login requirement
-        if "有异常请求从你的 IP 发出" in driver.page_source or "请 登录 使用豆瓣" in driver.page_source:
+        if is_login_challenge(driver.page_source):
             print("\n检测到需要登录挑战！请在浏览器中完成登录流程...")
             
             # Try to automate initial login button click
@@ -207,22 +466,15 @@ def handle_login_challenge(driver: webdriver.Chrome, url: str) -> bool:
             input("请在浏览器中完成登录后，按回车键继续...")
             
             # Refresh page to apply login session
-            driver.get(url)
-            
-            # Wait for page load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            navigate(driver, url, timeout=10)
             
             # Verify login success by checking for presence of challenge text
-            if "有异常请求从你的 IP 发出" in driver.page_source or "请 登录 使用豆瓣" in driver.page_source:
+            if is_login_challenge(driver.page_source):
                 print("登录似乎未成功，请再次尝试")
                 return False
             else:
                 print("登录成功！")
                 IS_LOGGED_IN = True
-                # Save cookies after successful login
-                save_cookies()
                 return True
         elif "个人主页" in driver.page_source or "我读" in driver.page_source:
             # User is already logged in (detected by presence of personal page elements)
@@ -236,7 +488,7 @@ def handle_login_challenge(driver: webdriver.Chrome, url: str) -> bool:
         return False
 
 
-def url_generator(user_id: str) -> Iterator[str]:
+def url_generator(user_id: str) -> Iterator[Tuple[str, Optional[Union[str, bytes]]]]:
     """
     Generate URLs for all pages of a user's movie collection.
     
@@ -245,11 +497,15 @@ def url_generator(user_id: str) -> Iterator[str]:
     mode is used for consistent parsing and handles the case where
     there is only a single page.
     
+    The first page has to be downloaded to read the paginator, so its
+    HTML is handed out with its URL instead of being fetched again.
+    
     Args:
         user_id (str): Douban user ID
         
     Yields:
-        str: URL for each page of the user's movie collection
+        tuple: (url, html) for each page of the user's movie collection,
+               where html is the already downloaded page or None
     """
     # Base URL for user's movie collection
     url = f"https://movie.douban.com/people/{user_id}/collect"
@@ -262,34 +518,14 @@ def url_generator(user_id: str) -> Iterator[str]:
     r = make_request(url)
     if not r:
         print("Failed to access user's collection page. Assuming one page only.")
-        yield url
-        return
-    
-    # Parse pagination information
-    soup = BeautifulSoup(r.text, "lxml")
-    paginator = soup.find("div", {"class": "paginator"})
-    
-    # Handle single page case
-    if not paginator:
-        print("总共 1 页")
-        yield url
+        yield url, None
         return
     
     # Process multi-page collections
     try:
-        page_links = paginator.find_all("a")
-        if not page_links:
-            print("总共 1 页")
-            yield url
-            return
-            
-        # Find maximum page number by checking all numeric link texts
-        max_page = 1
-        for link in page_links:
-            if link.text.isdigit():
-                page_num = int(link.text)
-                if page_num > max_page:
-                    max_page = page_num
+        # Find maximum page number among the numeric paginator links
+        tree = parse_html(r.content)
+        max_page = max((int(t) for t in _PAGINATOR_XP(tree) if t.strip().isdigit()), default=1)
         
         print(f"总共 {max_page} 页")
         
@@ -298,15 +534,15 @@ def url_generator(user_id: str) -> Iterator[str]:
             # Douban uses 0-based indexing with 15 items per page
             start_index = (page - 1) * 15
             page_url = f"https://movie.douban.com/people/{user_id}/collect?start={start_index}&sort=time&rating=all&filter=all&mode=grid"
-            yield page_url
+            yield page_url, r.content if page == 1 else None
             
     except Exception as e:
         print(f"解析分页时出错: {e}")
         print("继续使用单页...")
-        yield url
+        yield url, r.content
 
 
-def export(user_id: str) -> None:
+def export(user_id: str, start_dt: datetime = _START_DT) -> None:
     """
     Main function to export a user's movie collection to a CSV file.
     
@@ -314,48 +550,169 @@ def export(user_id: str) -> None:
     extracting movie information and saving it to a CSV file. It
     handles pagination, date filtering, and provides progress updates.
     
+    Collection pages are downloaded PAGE_CONCURRENCY at a time in worker
+    threads, while the pages themselves are parsed in order on the main
+    thread so the date cutoff still stops the export at the right movie.
+    A new download is only started when a page is taken for parsing.
+    Each parsed movie's IMDb lookup runs in a second pool, and a writer
+    thread appends the rows to movie.csv in collection order.
+    
     Args:
         user_id (str): Douban user ID to scrape
+        start_dt (datetime): Only movies marked after this date are exported.
+                             Default is START_DATE.
     """
     # Get URLs for all pages
-    urls = list(url_generator(user_id))  # Convert to list to get count
-    info: List[List[Union[str, int, None]]] = []
-    page_no = 1
-    
-    # Process each page URL
-    for url in urls:
-        # Stop if we've reached a movie before the cutoff date
-        if IS_OVER:
-            break
-                
-        print(f"Scraping page {page_no}/{len(urls)}")
-        
-        # Get movie information from current page
-        page_info = get_info(url)
-        if page_info:  # Only add data if the page had valid results
-            info.extend(page_info)
+    pages = list(url_generator(user_id))  # Convert to list to get count
+    total = 0  # Number of movies written so far
+    
+    # Parsed movies wait here, in collection order, for their IMDb lookup
+    # to finish; the bounded size stops parsing from running far ahead
+    rows_q: Queue = Queue(maxsize=ROW_QUEUE_SIZE)
+    
+    file_name = Path(os.path.dirname(os.path.abspath(__file__))) / 'movie.csv'
+    # Rows are streamed here and only replace movie.csv once the export
+    # produced any, so a blocked run doesn't wipe the previous export
+    tmp_name = file_name.with_name(file_name.name + '.tmp')
+    
+    write_error: Optional[BaseException] = None  # Why the writer thread stopped early
+    
+    def write_rows(f: Any) -> None:
+        """Write queued rows to the CSV once their IMDb ID is known."""
+        nonlocal total
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        while True:
+            item = rows_q.get()
+            if item is None:
+                break
+            row, imdb_future = item
+            # A failed lookup costs this movie its IMDb ID, not the export
+            try:
+                imdb_id = imdb_future.result()
+            except Exception as e:
+                log.warning("IMDb lookup failed for %s: %s", row[2], e)
+                imdb_id = None
+            row[2] = imdb_id  # The Douban link becomes the IMDb ID
+            writer.writerow(row)
+            total += 1
             
-        # Add random delay between pages to avoid rate limiting
-        if not IS_OVER:
-            delay = random.uniform(2, 5)
-            time.sleep(delay)
+            # Encode whatever is buffered to UTF-8 in one go once nothing
+            # else is ready, so after a crash movie.csv.tmp holds every
+            # row but those in flight
+            if rows_q.empty():
+                f.write(buffer.getvalue().encode('utf-8'))
+                f.flush()
+                buffer.seek(0)
+                buffer.truncate()
+        f.write(buffer.getvalue().encode('utf-8'))
+
+    def run_writer(f: Any) -> None:
+        """Thread target: remember why write_rows() stopped, if it failed."""
+        nonlocal write_error
+        try:
+            write_rows(f)
+        except BaseException as e:
+            write_error = e
+
+    def put_row(item: Any) -> None:
+        """Queue an item for the writer without blocking on a dead writer."""
+        while csv_writer.is_alive():
+            try:
+                rows_q.put(item, timeout=1)
+                return
+            except Full:
+                continue
+        raise RuntimeError(f"CSV writer stopped: {write_error}") from write_error
+
+    # Pipeline: page downloads -> parsing (this thread) -> IMDb lookups ->
+    # CSV writer thread. Every stage is bounded, so memory use does not
+    # grow with the size of the collection.
+    with open(tmp_name, 'wb') as f, \
+            ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY) as pool, \
+            ThreadPoolExecutor(max_workers=IMDB_CONCURRENCY) as imdb_pool:
+        csv_writer = threading.Thread(target=run_writer, args=(f,), daemon=True)
+        csv_writer.start()
+        
+        requested = set()  # Page URLs already downloaded or queued
+        lookups: Dict[str, Any] = {}  # Douban link -> future of its IMDb lookup
+        remaining = iter(pages)
+        # (url, prefetched html, future) for queued pages, in page order
+        pending: deque = deque()
+        
+        def queue_next() -> None:
+            """Queue the download of the next page not requested yet."""
+            for url, prefetched in remaining:
+                if url in requested:
+                    continue
+                requested.add(url)
+                future = pool.submit(fetch_page, url) if prefetched is None else None
+                pending.append((url, prefetched, future))
+                return
+        
+        # Keep PAGE_CONCURRENCY pages downloading ahead of the one being
+        # parsed and only request another when a page is taken off the
+        # queue, so few pages past the date cutoff are ever fetched
+        for _ in range(PAGE_CONCURRENCY):
+            queue_next()
+        
+        page_no = 0
+        try:
+            # Stop if we've reached a movie before the cutoff date
+            while pending and not IS_OVER:
+                url, prefetched, future = pending.popleft()
+                queue_next()
+                page_no += 1
+                        
+                print(f"Scraping page {page_no}/{len(pages)}")
+                
+                # Get movie information from current page
+                html = prefetched if future is None else future.result()
+                page_info = get_info(url, html, start_dt) if html is not None else None
+                del html, prefetched
+                
+                # Look up IMDb IDs in the background; put() blocks while
+                # the writer is ROW_QUEUE_SIZE rows behind. A movie seen on
+                # an earlier page (the list can shift while it is being
+                # scraped) reuses that lookup instead of fetching again.
+                for row in page_info or []:
+                    link = row[2]
+                    if link not in lookups:
+                        lookups[link] = imdb_pool.submit(get_imdb_id, link)
+                    put_row((row, lookups[link]))
+                del page_info
+                
+                # Return freed page memory regularly during long exports
+                if page_no % GC_EVERY_PAGES == 0:
+                    gc.collect()
+        finally:
+            # Don't download pages past the cutoff
+            for _, _, future in pending:
+                if future is not None:
+                    future.cancel()
             
-        page_no += 1
+            # Let the writer finish the rows already queued, unless it has
+            # already died and nothing would ever take the sentinel
+            try:
+                put_row(None)
+            except RuntimeError:
+                pass
+            csv_writer.join()
+        
+        if write_error is not None:
+            raise write_error
     
     # Handle case where no movie data was collected
-    if not info:
+    if not total:
+        os.remove(tmp_name)
         print("未能获取到任何电影数据。这可能是由于豆瓣的反爬虫机制导致的。")
         print("请尝试：")
         print("1. 在浏览器中手动登录豆瓣，然后再运行脚本")
         print("2. 尝试使用非无头模式的浏览器")
         return
         
-    # Save collected data to CSV file
-    print(f'处理完成, 总共处理了 {len(info)} 部电影')
-    file_name = Path(os.path.dirname(os.path.abspath(__file__))) / 'movie.csv'
-    with open(file_name, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f, lineterminator='\n')
-        writer.writerows(info)
+    os.replace(tmp_name, file_name)
+    print(f'处理完成, 总共处理了 {total} 部电影')
     print('保存电影评分至：', file_name)
 
 
@@ -376,8 +733,8 @@ def check_user_exist(user_id: str) -> bool:
     if not r:
         return False
         
-    soup = BeautifulSoup(r.text, 'lxml')
-    if soup.title and '页面不存在' in soup.title.text:
+    tree = parse_html(r.content)
+    if '页面不存在' in _PAGE_TITLE_XP(tree):
         return False
     else:
         return True
@@ -385,25 +742,44 @@ def check_user_exist(user_id: str) -> bool:
 
 def save_cookies() -> bool:
     """
-    Save browser session cookies to a file for later use.
+    Save the login session cookies to a file for later use.
     
-    This function serializes the current WebDriver's cookies to a pickle file,
-    allowing authentication state to be preserved between script runs.
+    The cookies of the shared HTTP session are written to a JSON file, after
+    taking in the browser's cookies if a browser is still open. That jar
+    holds the browser login as well as anything Douban set over plain HTTP,
+    so authentication state is preserved between script runs. Registered
+    to run once at interpreter exit rather than after every login.
     
     Returns:
         bool: True if cookies were saved successfully, False otherwise
     """
-    if DRIVER:
-        try:
-            print("保存登录cookies...")
-            # Create directory if it doesn't exist
-            COOKIE_FILE.parent.mkdir(parents=True, exist_ok=True)
-            # Serialize cookies to pickle file
-            pickle.dump(DRIVER.get_cookies(), open(COOKIE_FILE, "wb"))
-            print(f"Cookies已保存到: {COOKIE_FILE}")
-            return True
-        except Exception as e:
-            print(f"保存cookies时出错: {e}")
+    try:
+        if DRIVER:
+            set_session_cookies(DRIVER.get_cookies())
+        cookies = [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'secure': cookie.secure,
+                **({'expiry': int(cookie.expires)} if cookie.expires else {}),
+            }
+            for cookie in SESSION.cookies
+        ]
+        if not cookies:
+            return False
+            
+        print("保存登录cookies...")
+        # Create directory if it doesn't exist
+        COOKIE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # Serialize cookies to JSON file
+        with COOKIE_FILE.open("w", encoding="utf-8") as f:
+            json.dump(cookies, f, ensure_ascii=False)
+        print(f"Cookies已保存到: {COOKIE_FILE}")
+        return True
+    except Exception as e:
+        print(f"保存cookies时出错: {e}")
     return False
 
 
@@ -429,7 +805,8 @@ def load_cookies() -> bool:
         
     try:
         print("正在加载已保存的cookies...")
-        cookies = pickle.load(open(COOKIE_FILE, "rb"))
+        with COOKIE_FILE.open(encoding="utf-8") as f:
+            cookies = json.load(f)
         
         # Visit domain first to ensure cookies can be set
         DRIVER.get("https://www.douban.com")
@@ -450,6 +827,7 @@ def load_cookies() -> bool:
         if "你的账号" in DRIVER.page_source or "我的豆瓣" in DRIVER.page_source:
             print("通过保存的Cookies成功登录!")
             IS_LOGGED_IN = True
+            set_session_cookies(DRIVER.get_cookies())
             return True
         else:
             print("使用保存的cookies登录失败")
@@ -459,13 +837,54 @@ def load_cookies() -> bool:
         return False
 
 
+def set_session_cookies(cookies: List[Dict[str, Any]]) -> None:
+    """
+    Copy browser cookies into the shared HTTP session.
+    
+    Args:
+        cookies (list): Cookies as returned by WebDriver.get_cookies()
+    """
+    for cookie in cookies:
+        SESSION.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain', ''),
+            path=cookie.get('path', '/'),
+        )
+
+
+def load_session_cookies() -> bool:
+    """
+    Load the cookies saved by save_cookies() into the shared HTTP session.
+    
+    This lets plain HTTP requests use a previous login without starting
+    the browser first.
+    
+    Returns:
+        bool: True if saved cookies were loaded, False otherwise
+    """
+    if not COOKIE_FILE.exists():
+        return False
+        
+    try:
+        with COOKIE_FILE.open(encoding="utf-8") as f:
+            cookies = json.load(f)
+        set_session_cookies(cookies)
+        return True
+    except Exception as e:
+        print(f"加载cookies时出错: {e}")
+        return False
+
+
 def make_request(url: str, use_selenium: bool = False) -> Optional[Union[requests.Response, Any]]:
     """
-    Make an HTTP request with retry functionality and anti-bot detection measures.
+    Make an HTTP request, falling back to the browser when Douban refuses it.
     
-    This function attempts to retrieve content from a URL using either requests library 
-    (for efficiency) or Selenium WebDriver (for handling pages requiring JavaScript). 
-    It includes retry logic for handling transient failures.
+    The page is first requested through SESSION, whose adapter already
+    retries connection errors and 5xx answers with exponential backoff
+    (honouring Retry-After). If Douban still refuses the request with a
+    403, a login challenge or a network error, the page is loaded with
+    Selenium WebDriver instead, retrying up to MAX_RETRIES times.
     
     Args:
         url (str): The URL to request
@@ -476,28 +895,40 @@ def make_request(url: str, use_selenium: bool = False) -> Optional[Union[request
         requests.Response or Any: The response object or page source if using Selenium.
                                  None if all retries fail.
     """
-    global DRIVER
-    
-    # For Douban, let's default to using Selenium first since 
-    # it's more likely to work with current access restrictions
-    if "douban.com" in url and not use_selenium:
-        print("Using Selenium for Douban access by default")
-        use_selenium = True
+    if not use_selenium:
+        try:
+            # Use requests library for efficiency with simple pages
+            response = SESSION.get(
+                url, 
+                headers=get_request_headers(), 
+                timeout=20, 
+                verify=False  # Disable SSL verification
+            )
+            
+            # Check for successful response
+            if response.status_code == 200:
+                if not is_login_challenge(response.content):
+                    return response
+                # Only the browser can get past the login challenge
+                print("Login challenge received, switching to Selenium WebDriver")
+            elif response.status_code == 403:
+                print("Received 403 Forbidden, switching to Selenium WebDriver")
+            else:
+                print(f"HTTP error {response.status_code} for {url}")
+                return None
+        except requests.RequestException as e:
+            print(f"Request error: {e}")
+            print("Switching to Selenium WebDriver")
     
     for attempt in range(MAX_RETRIES):
         try:
-            if use_selenium or DRIVER:
-                # Use Selenium for JavaScript-heavy pages or if driver already exists
+            # Only one thread at a time may drive the shared browser
+            with DRIVER_LOCK:
                 driver = setup_driver(headless=False)  # Use visible browser to debug issues
                 
                 print(f"Attempting to access URL: {url}")
-                # Navigate to the URL
-                driver.get(url)
-                
-                # Wait for page to load
-                WebDriverWait(driver, 20).until(  # Extended timeout
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
+                # Navigate to the URL and wait for its DOM
+                navigate(driver, url, timeout=20)  # Extended timeout
                 
                 # Debug output - check if we're getting a blank page or connection issues
                 if "无法访问此网站" in driver.page_source or "ERR_" in driver.page_source:
@@ -505,92 +936,40 @@ def make_request(url: str, use_selenium: bool = False) -> Optional[Union[request
                     raise WebDriverException("Connection error in browser")
                 
                 # Handle login challenges if they appear
-                if not handle_login_challenge(driver, url):
-                    if attempt < MAX_RETRIES - 1:
-                        # Add increasing delay between retries
-                        delay = RETRY_DELAY * (2 ** attempt) + random.uniform(1, 5)
-                        print(f"Login failed. Retrying in {delay:.2f} seconds...")
-                        time.sleep(delay)
-                        continue
-                    else:
-                        return None
+                logged_in = handle_login_challenge(driver, url)
                 
-                # Return an object with a 'text' attribute that contains the page source
-                return type('ResponseLike', (), {'text': driver.page_source})()
-            else:
-                # Use requests library for efficiency with simple pages
-                headers = {
-                    'User-Agent': get_random_user_agent(),
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                    'Pragma': 'no-cache',
-                    'Cache-Control': 'no-cache',
-                }
+                # The content is there; don't let late ads and trackers
+                # keep loading into the page we are about to copy
+                driver.execute_script("window.stop();")
+                page_source = driver.page_source
                 
-                # Explicitly disable proxies to avoid connection issues
-                response = requests.get(
-                    url, 
-                    headers=headers, 
-                    timeout=20, 
-                    proxies={},
-                    verify=False  # Disable SSL verification
-                )
+                # Let the plain HTTP requests that follow use this session
+                if logged_in:
+                    set_session_cookies(driver.get_cookies())
                 
-                # Check for successful response
-                if response.status_code == 200:
-                    return response
+            if not logged_in:
+                if attempt < MAX_RETRIES - 1:
+                    # Add increasing delay between retries
+                    delay = RETRY_DELAY * (2 ** attempt) + random.uniform(1, 5)
+                    print(f"Login failed. Retrying in {delay:.2f} seconds...")
+                    time.sleep(delay)
+                    continue
                 else:
-                    print(f"HTTP error {response.status_code} for {url}")
-                    
-                    # Switch to Selenium for better handling on next retry
-                    if response.status_code == 403:
-                        print("Received 403 Forbidden, switching to Selenium WebDriver for next attempt")
-                        use_selenium = True
-                        
-        except requests.exceptions.SSLError as e:
-            print(f"SSL Error: {e}")
-            print("Trying with SSL verification disabled...")
-            # Try immediate retry with SSL verification disabled
-            try:
-                headers = {'User-Agent': get_random_user_agent()}
-                response = requests.get(url, headers=headers, timeout=20, proxies={}, verify=False)
-                if response.status_code == 200:
-                    return response
-            except:
-                # If immediate retry fails, continue with normal retry process
-                pass
-                
-        except requests.exceptions.ProxyError as e:
-            print(f"Proxy connection error: {e}")
-            print("Disabling proxy settings for next attempt...")
-            # Clear any environment variables that might be setting proxies
-            if 'HTTP_PROXY' in os.environ:
-                os.environ.pop('HTTP_PROXY')
-            if 'HTTPS_PROXY' in os.environ:
-                os.environ.pop('HTTPS_PROXY')
-            os.environ['NO_PROXY'] = '*'
+                    return None
             
-            # For the next attempt, try with Selenium which may handle proxies differently
-            if attempt < MAX_RETRIES - 1 and not use_selenium:
-                print("Switching to Selenium for next attempt due to proxy issues")
-                use_selenium = True
-                
-        except requests.RequestException as e:
-            print(f"Request error: {e}")
-            # If we're getting connectivity errors, try with Selenium next
-            if "ConnectionError" in str(e) and not use_selenium:
-                print("Connection error detected, switching to Selenium WebDriver for next attempt")
-                use_selenium = True
+            # Return an object with 'text' and 'content' attributes that contain
+            # the page source, so callers can treat it like a requests.Response
+            return type('ResponseLike', (), {'text': page_source, 'content': page_source})()
+                        
         except (TimeoutException, WebDriverException) as e:
             print(f"Browser error: {e}")
             # Try refreshing the page
             if DRIVER:
                 try:
                     print("Attempting to refresh the page...")
-                    DRIVER.refresh()
-                    time.sleep(5)  # Give it time to reload
+                    with DRIVER_LOCK:
+                        DRIVER.refresh()
+                        time.sleep(5)  # Give it time to reload
                 except:
                     pass
         except Exception as e:
@@ -611,35 +990,172 @@ def make_request(url: str, use_selenium: bool = False) -> Optional[Union[request
     return None
 
 
-def get_rating(rating_class: Optional[str]) -> Optional[int]:
+def fetch_page(url: str) -> Optional[Union[str, bytes]]:
     """
-    Extract rating value from Douban's CSS class name.
+    Download one Douban page, suitable for a worker thread.
+    
+    Used for collection pages as well as movie pages. The page is fetched
+    over plain HTTP, paced by DOUBAN_LIMITER. Only if that fails, or Douban
+    answers with a 403 or its login challenge, does the function load the
+    page in the browser through make_request(), whose Selenium path is
+    serialized by DRIVER_LOCK. Other HTTP errors give up on the page.
     
     Args:
-        rating_class (str): CSS class name, e.g., "rating4-t" 
+        url (str): URL of a Douban page
         
     Returns:
-        int or None: Rating value (1-5) or None if no rating
+        bytes, str or None: HTML of the page (raw bytes when fetched over
+                            HTTP), or None if it couldn't be retrieved
     """
-    if not rating_class:
-        return None
+    try:
+        for _ in range(MAX_RETRIES):
+            DOUBAN_LIMITER.acquire()
+            # Collection pages and movie pages share one per-host budget, so
+            # the two pools together never exceed MAX_DOUBAN_REQUESTS
+            with DOUBAN_SLOTS:
+                response = SESSION.get(url, headers=get_request_headers(), timeout=20, verify=False)
+            if response.status_code != 429:
+                DOUBAN_LIMITER.reset()
+                break
+            # Rate limited: slow every thread down before trying again
+            retry_after = response.headers.get('Retry-After', '')
+            DOUBAN_LIMITER.penalize(float(retry_after) if retry_after.isdigit() else None)
+        if response.status_code == 200 and not is_login_challenge(response.content):
+            return response.content
+        if response.status_code not in (200, 403):
+            log.warning("HTTP error %s for %s", response.status_code, url)
+            return None
+        log.info("Plain HTTP fetch of %s was refused, falling back to the browser", url)
+    except requests.RequestException as e:
+        log.info("Request error for %s: %s, falling back to the browser", url, e)
         
-    # Expected format is "ratingX-t" where X is 1-5
+    # Go straight to the browser: another plain GET would only be refused
+    # again, and would bypass DOUBAN_SLOTS and DOUBAN_LIMITER
+    r = make_request(url, use_selenium=True)
+    return r.content if r else None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_text: str) -> Optional[datetime]:
+    """
+    Parse a date as Douban prints it, in any of the formats it uses.
+    
+    The three formats only differ in their separator, so a single regex
+    splits out the numbers instead of strptime interpreting a format
+    string per call. Results are also cached, since a collection repeats
+    the same dates a lot.
+    
+    Args:
+        date_text (str): Date such as "2021-08-01", "2021.08.01" or "2021/08/01"
+        
+    Returns:
+        datetime or None: The parsed date, or None if it isn't a valid date
+    """
+    match = _DATE_RE.fullmatch(date_text)
+    if not match:
+        return None
+    year, _, month, day = match.groups()
     try:
-        # Extract the digit from the class name
-        rating_digit = int(rating_class.replace("rating", "").replace("-t", ""))
-        return rating_digit if 1 <= rating_digit <= 5 else None
-    except (ValueError, AttributeError):
+        return datetime(int(year), int(month), int(day))
+    except ValueError:  # e.g. 2021-02-30
         return None
 
 
+def is_before_cutoff(rated_on: datetime, start_dt: datetime = _START_DT) -> bool:
+    """
+    Check whether a movie was marked on or before the start date.
+    
+    Douban lists the collection newest first, so the export stops at the
+    first such movie.
+    
+    Args:
+        rated_on (datetime): Date the user marked the movie
+        start_dt (datetime): The start date. Default is START_DATE.
+        
+    Returns:
+        bool: True if the movie is outside the requested date range
+    """
+    return rated_on <= start_dt
+
+
+def open_imdb_cache() -> None:
+    """
+    Open (and create if needed) the persistent Douban URL -> IMDb ID cache.
+    
+    IDs cached by older versions in imdb_cache.json are imported once and
+    that file is removed. If the database can't be opened, IMDB_CACHE
+    stays None and every lookup goes to Douban.
+    """
+    global IMDB_CACHE
+    
+    try:
+        conn = sqlite3.connect(IMDB_CACHE_FILE, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS imdb(douban TEXT PRIMARY KEY, imdb TEXT)')
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"打开IMDb ID缓存时出错: {e}")
+        return
+    IMDB_CACHE = conn
+    
+    if LEGACY_IMDB_CACHE_FILE.exists():
+        try:
+            with open(LEGACY_IMDB_CACHE_FILE, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            conn.executemany('INSERT OR IGNORE INTO imdb(douban, imdb) VALUES (?, ?)', legacy.items())
+            conn.commit()
+            LEGACY_IMDB_CACHE_FILE.unlink()
+        except (OSError, ValueError, AttributeError, sqlite3.Error) as e:
+            print(f"读取IMDb ID缓存时出错: {e}")
+
+
+def close_imdb_cache() -> None:
+    """
+    Close the IMDb ID cache. Registered to run at interpreter exit.
+    """
+    with IMDB_CACHE_LOCK:
+        if IMDB_CACHE is not None:
+            IMDB_CACHE.close()
+
+
 def get_imdb_id(douban_url: str) -> Optional[str]:
+    """
+    Get the IMDb ID of a Douban movie, using the persistent cache first.
+    
+    IMDb IDs never change for a movie, so once found they are stored in
+    IMDB_CACHE right away and re-runs don't have to open the movie page
+    again, even after an interrupted run.
+    
+    Args:
+        douban_url (str): URL of the Douban movie page
+        
+    Returns:
+        str or None: IMDb ID in ttXXXXXXX format, or None if not found
+    """
+    if IMDB_CACHE is not None:
+        with IMDB_CACHE_LOCK:
+            row = IMDB_CACHE.execute('SELECT imdb FROM imdb WHERE douban = ?', (douban_url,)).fetchone()
+        if row:
+            return row[0]
+        
+    imdb_id = fetch_imdb_id(douban_url)
+    if imdb_id and IMDB_CACHE is not None:
+        with IMDB_CACHE_LOCK:
+            IMDB_CACHE.execute('INSERT OR REPLACE INTO imdb(douban, imdb) VALUES (?, ?)', (douban_url, imdb_id))
+            IMDB_CACHE.commit()
+    return imdb_id
+
+
+def fetch_imdb_id(douban_url: str) -> Optional[str]:
     """
     Extract IMDb ID from a Douban movie page.
     
     Retrieves the IMDb ID (ttXXXXXXX format) from the movie's Douban page
     by analyzing the page's sidebar where external links are listed.
     
+    The sidebar is server-rendered, so the page is fetched over plain HTTP;
+    the browser is only used when Douban answers with its login challenge.
+    
     Args:
         douban_url (str): URL of the Douban movie page
         
@@ -648,52 +1164,55 @@ def get_imdb_id(douban_url: str) -> Optional[str]:
     """
     try:
         # Get the movie page
-        r = make_request(douban_url, use_selenium=True)
-        if not r:
-            print(f"Failed to access movie page: {douban_url}")
+        html = fetch_page(douban_url)
+        if html is None:
+            log.warning("Failed to access movie page: %s", douban_url)
             return None
             
+        # Fast path: pick the ID straight out of the raw page, which works
+        # for the usual layout without building a tree at all
+        raw = html.encode("utf-8") if isinstance(html, str) else html
+        match = _IMDB_LABEL_RE.search(raw)
+        if match:
+            return match.group(1).decode("ascii")
+            
         # Parse the page
-        soup = BeautifulSoup(r.text, "lxml")
+        tree = parse_html(html)
         
         # Look for IMDb ID in the info section
-        info_section = soup.select_one("#info")
-        if not info_section:
-            print(f"Could not find info section on page: {douban_url}")
+        if not _INFO_XP(tree):
+            log.warning("Could not find info section on page: %s", douban_url)
             return None
             
         # Try different approaches to find the IMDb ID
         
-        # 1. Look for 'IMDb' text followed by the ID
-        for span in info_section.find_all("span", class_="pl"):
-            if "IMDb" in span.text:
-                imdb_text = span.next_sibling
-                if imdb_text and isinstance(imdb_text, str):
-                    imdb_id = imdb_text.strip()
-                    if imdb_id.startswith("tt"):
-                        return imdb_id
+        # 1. Look for 'IMDb' label followed by the ID
+        for imdb_text in _IMDB_LABEL_XP(tree):
+            imdb_id = imdb_text.strip()
+            if imdb_id.startswith("tt"):
+                return imdb_id
         
         # 2. Look for external links containing IMDb
-        imdb_link = soup.select_one('a[href*="imdb.com/title/tt"]')
-        if imdb_link:
-            href = imdb_link.get("href", "")
-            match = re.search(r'(tt\d+)', href)
+        for href in _IMDB_HREF_XP(tree):
+            match = _IMDB_RE.search(href)
             if match:
-                return match.group(1)
+                return match.group()
                 
         # 3. Last resort: look for any text that looks like an IMDb ID
-        for text in info_section.stripped_strings:
-            if text.startswith("tt") and len(text) > 3 and text[2:].isdigit():
+        for text in _INFO_TEXT_XP(tree):
+            text = text.strip()
+            if _IMDB_RE.fullmatch(text):
                 return text
                 
-        print(f"No IMDb ID found for: {douban_url}")
+        log.warning("No IMDb ID found for: %s", douban_url)
         return None
     except Exception as e:
-        print(f"Error retrieving IMDb ID: {e}")
+        log.warning("Error retrieving IMDb ID: %s", e)
         return None
 
 
-def get_info(url: str) -> Optional[List[List[Union[str, Optional[int], Optional[str]]]]]:
+def get_info(url: str, html: Optional[Union[str, bytes]] = None,
+             start_dt: datetime = _START_DT) -> Optional[List[List[Union[str, Optional[int], Optional[str]]]]]:
     """
     Extract movie information from a page of a user's Douban collection.
     
@@ -703,23 +1222,29 @@ def get_info(url: str) -> Optional[List[List[Union[str, Optional[int], Optional[
     
     Args:
         url (str): URL of a page from the user's Douban collection
+        html (str or bytes): Already downloaded HTML of the page. Default is None
+                    (the page is requested here).
+        start_dt (datetime): Movies marked on or before this date end the
+                             export. Default is START_DATE.
         
     Returns:
-        list or None: List of movies, each as [title, rating, imdb_id]
+        list or None: List of movies, each as [title, rating, douban_link, date]
                     None if parsing fails
     """
     info: List[List[Union[str, Optional[int], Optional[str]]]] = []
     
-    # Make the request to get the page
-    r = make_request(url)
-    if not r:
-        return None
+    if html is None:
+        # Make the request to get the page
+        r = make_request(url)
+        if not r:
+            return None
+        html = r.content
         
     # Parse the HTML content
-    soup = BeautifulSoup(r.text, "lxml")
+    tree = parse_html(html)
     
     # Find all movie items on the page
-    movie_items = soup.find_all("div", {"class": "item"})
+    movie_items = _ITEM_XP(tree)
     
     # If no items were found, the page might have a different structure
     # or could be empty (e.g., end of collection)
@@ -730,106 +1255,62 @@ def get_info(url: str) -> Optional[List[List[Union[str, Optional[int], Optional[
     # Process each movie item
     for item in movie_items:
         try:
-            # 1. Get the movie title
-            title_elem = item.find("li", {"class": "title"})
-            if not title_elem or not title_elem.em:
-                title_elem = item.select_one(".title a") or item.select_one("a.title")
-                
-            if title_elem:
-                title = title_elem.text.strip() if not title_elem.em else title_elem.em.text.strip()
-            else:
-                print("Could not find title element, skipping item")
-                continue
-                
-            # 2. Get the movie's Douban link for further processing
-            link_elem = item.find("a", href=True)
-            if not link_elem:
-                print(f"No link element found for movie: {title}")
-                continue
-                
-            douban_link = link_elem["href"]
+            # Read every field of the item in one XPath evaluation
+            (title, title_link, douban_link, rating_class, stars_class,
+             date_text, alt_date_text) = _ITEM_FIELDS_XP(item).split('\t')
             
-            # 3. Get user's rating (1-5 stars)
-            rating = None
-            rating_elem = item.find("span", class_=lambda c: c and c.startswith("rating"))
-            
-            if rating_elem:
-                rating = get_rating(rating_elem["class"][0])
-            else:
-                # Try alternative rating elements
-                rating_elem = (
-                    item.select_one(".rate-stars") or 
-                    item.select_one(".rating")
-                )
-                if rating_elem:
-                    # Parse stars directly if available
-                    stars = rating_elem.get("class", [])
-                    for star_class in stars:
-                        if star_class.startswith("rating") and star_class.endswith("-t"):
-                            rating = get_rating(star_class)
-                            break
+            title = title or title_link
             
-            # 4. Get comment date
-            comment_date = None
-            date_span = item.find("span", {"class": "date"})
-            
-            if date_span:
-                comment_date = date_span.text.strip()
-            else:
-                # Alternative date selectors
-                date_elem = (
-                    item.select_one(".date") or
-                    item.select_one("time") or
-                    item.select_one(".time") or
-                    item.select_one(".collect-date")
-                )
-                if date_elem:
-                    comment_date = date_elem.text.strip()
+            # 1. Get comment date first: once a movie is past the cutoff
+            # nothing else about it (or the rest of the page) is needed
+            comment_date = date_text or alt_date_text or None
             
             # Use current date as fallback if no date found
             if not comment_date:
-                print(f"无法获取日期，使用当前日期: {title}")
-                from datetime import date
-                comment_date = date.today().strftime('%Y-%m-%d')
+                log.warning("无法获取日期，使用当前日期: %s", title)
+                comment_date = date.today().isoformat()
             
             # Normalize date format across different possible formats
-            if comment_date:
-                date_formats = ['%Y-%m-%d', '%Y.%m.%d', '%Y/%m/%d']
-                normalized_date = None
-                
-                for fmt in date_formats:
-                    try:
-                        parsed_date = datetime.strptime(comment_date, fmt)
-                        normalized_date = parsed_date.strftime('%Y-%m-%d')
-                        break
-                    except ValueError:
-                        continue
-                
-                if normalized_date:
-                    comment_date = normalized_date
-                else:
-                    print(f"警告: 无法解析日期格式 '{comment_date}'，使用原始格式")
+            parsed_date = _parse_date(comment_date)
             
-            # 5. Check if date is earlier than cutoff date, stop processing if it is
-            try:
-                if datetime.strptime(comment_date, '%Y-%m-%d') <= datetime.strptime(START_DATE, '%Y%m%d'):
-                    global IS_OVER
-                    IS_OVER = True
-                    break
-            except ValueError as e:
-                print(f"Date parsing error: {e} for date {comment_date}")
+            # 2. Check if date is earlier than cutoff date, stop processing if it is
+            if parsed_date is None:
+                log.warning("警告: 无法解析日期格式 '%s'，跳过: %s", comment_date, title)
+                continue
+            if is_before_cutoff(parsed_date, start_dt):
+                global IS_OVER
+                IS_OVER = True
+                break
+            comment_date = parsed_date.strftime('%Y-%m-%d')
+            
+            # 3. Check the movie title
+            if not title:
+                log.warning("Could not find title element, skipping item")
+                continue
+                
+            # 4. Get the movie's Douban link for further processing
+            if not douban_link:
+                log.warning("No link element found for movie: %s", title)
                 continue
             
-            # 6. Get IMDB ID with delay to avoid rate limiting
-            time.sleep(random.uniform(1, 2))
-            imdb = get_imdb_id(douban_link)
+            # 5. Get user's rating (1-5 stars)
+            rating = None
+            
+            # Scan the class list of the rating element, or of the alternative
+            # rating element, for the first known rating class
+            for star_class in (rating_class or stars_class).split():
+                rating = _RATING_MAP.get(star_class)
+                if rating is not None:
+                    break
             
-            # 7. Store the extracted information
-            info.append([title, rating, imdb])
-            print(f"Processing: {title[:20]}{'...' if len(title) > 20 else ''}")
+            # 6. Store the extracted information; the Douban link is replaced
+            # by the IMDb ID later, in export()
+            info.append([title, rating, douban_link, comment_date])
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Processing: %s", title if len(title) <= 20 else title[:20] + '...')
             
         except Exception as e:
-            print(f"Error processing movie item: {str(e)}")
+            log.warning("Error processing movie item: %s", e)
             continue
     
     return info
@@ -850,18 +1331,29 @@ if __name__ == '__main__':
     parser.add_argument('--visible', '-v', action='store_true', help='Run in visible browser mode (non-headless)')
     parser.add_argument('--manual-login', '-m', action='store_true', help='Open browser for manual login before scraping')
     parser.add_argument('--no-cache', '-n', action='store_true', help='Do not use or save cookies cache')
+    parser.add_argument('--verbose', action='store_true', help='Print a line for every movie processed')
     
     # Parse command-line arguments
     args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(message)s',
+        stream=sys.stdout,
+    )
     
-    # Configure global variables based on command-line arguments
+    # Parse the command-line arguments once; the start date is handed to export()
     user_id = args.user_id
-    if args.start_date:
-        # Use module-level START_DATE without global declaration
-        # This is valid in Python because we're modifying it at module level
-        globals()['START_DATE'] = args.start_date
+    try:
+        start_dt = datetime.strptime(args.start_date, '%Y%m%d')
+    except ValueError:
+        print(f'Invalid start date: {args.start_date}. Expected YYYYMMDD, e.g. 20050502')
+        sys.exit(1)
         
-    print(f'Starting to scrape {"all" if START_DATE == "20050502" else f"post {START_DATE}"} movie ratings...')
+    print(f'Starting to scrape {"all" if start_dt == _START_DT else f"post {args.start_date}"} movie ratings...')
+    
+    # Open the store of previously found IMDb IDs and close it when the script ends
+    open_imdb_cache()
+    atexit.register(close_imdb_cache)
     
     # Verify user exists
     if not check_user_exist(user_id):
@@ -871,6 +1363,12 @@ if __name__ == '__main__':
         
     # Initialize browser if automated session is needed
     try:
+        # Give the plain HTTP requests the saved login session, and write
+        # the session back once when the script ends
+        if not args.no_cache:
+            load_session_cookies()
+            atexit.register(save_cookies)
+            
         # Set up the browser (visible or headless based on command-line flag)
         driver = setup_driver(headless=not args.visible)
         
@@ -885,12 +1383,12 @@ if __name__ == '__main__':
             if "个人主页" in driver.page_source or "我的豆瓣" in driver.page_source:
                 print("Login successful!")
                 IS_LOGGED_IN = True
-                save_cookies()  # Save the new session cookies
+                set_session_cookies(driver.get_cookies())  # Written to disk at exit
             else:
                 print("Login unsuccessful or couldn't be detected")
                 
         # Start the export process
-        export(user_id)
+        export(user_id, start_dt)
         
     except KeyboardInterrupt:
         print("\nProcess interrupted by user. Cleaning up...")
@@ -899,4 +1397,5 @@ if __name__ == '__main__':
     finally:
         # Clean up resources
         quit_driver()
+        SESSION.close()  # Close the pooled keep-alive connections
         print("Done!")